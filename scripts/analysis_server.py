@@ -0,0 +1,275 @@
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from interning import load_interning, previous_occurrence, next_occurrence
+from multi_granularity import GRANULARITIES, ALIGNMENT_SIZES, alignment_counts, coarsen
+from stride_profile import stride_profile
+from working_set import working_set_series, mean_working_set_curve, fault_rate_curve
+
+HOST = "127.0.0.1"
+PORT = 8765
+CACHE_BYTES = 2 << 30           # budget for derived structures (LRU eviction)
+MAX_TAU = 1 << 20               # working-set curves are precomputed up to this tau
+
+
+# -----------------------------------------------------------------------------
+# LRU cache of derived arrays, bounded by their total size in bytes
+# -----------------------------------------------------------------------------
+def nbytes(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(nbytes(v) for v in value)
+    return 0
+
+
+class DerivedCache:
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()    # key -> (value, size)
+        self.size = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key][0]
+            self.misses += 1
+        value = compute()
+        size = nbytes(value)
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = (value, size)
+                self.size += size
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+        return value
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.size, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses,
+                "keys": [list(map(str, k)) for k in self.entries]}
+
+
+# -----------------------------------------------------------------------------
+# Analysis service: traces stay resident, derived structures are cached
+# -----------------------------------------------------------------------------
+class AnalysisService:
+    def __init__(self, cache_bytes=CACHE_BYTES):
+        self.traces = {}                # path -> (table, ids) held in memory
+        self.cache = DerivedCache(cache_bytes)
+        self.lock = threading.Lock()
+
+    def trace(self, path):
+        path = os.path.abspath(path)
+        with self.lock:
+            if path not in self.traces:
+                table, ids = load_interning(path)
+                self.traces[path] = (np.asarray(table), np.array(ids))
+            return path, self.traces[path]
+
+    def addresses(self, path):
+        path, (table, ids) = self.trace(path)
+        return self.cache.get(("addresses", path), lambda: table[ids])
+
+    def unit_ids(self, path, unit):
+        path, (table, ids) = self.trace(path)
+        return self.cache.get(("ids", path, unit), lambda: coarsen(table, ids, GRANULARITIES[unit])[1])
+
+    def prev(self, path, unit):
+        return self.cache.get(("prev", path, unit), lambda: previous_occurrence(self.unit_ids(path, unit)))
+
+    def next(self, path, unit):
+        return self.cache.get(("next", path, unit), lambda: next_occurrence(self.unit_ids(path, unit)))
+
+    # ---- queries ----
+    def q_load(self, trace):
+        path, (table, ids) = self.trace(trace)
+        return {"trace": path, "refs": len(ids), "unique": len(table)}
+
+    def q_locality(self, trace, window=100, start=0, end=None, unit="byte"):
+        """la.py metrics over references start..end-1 (temporal reuse counted inside the range)."""
+        path, _ = self.trace(trace)
+        addr = self.addresses(path)
+        end = len(addr) if end is None else min(int(end), len(addr))
+        start, window = int(start), int(window)
+        units = (addr[start:end] >> np.uint64(GRANULARITIES[unit])).astype(np.int64)
+        prev = self.prev(path, unit)[start:end]
+        pos = np.arange(start, end)
+        diff = np.diff(units)
+        spatial_distance = window if unit == "byte" else 1
+        total = max(end - start, 1)
+        return {
+            "refs": end - start,
+            "spatial": np.count_nonzero(np.abs(diff) <= spatial_distance) / total * 100,
+            "sequential": np.count_nonzero((diff > 0) & (diff <= (8 if unit == "byte" else 1))) / total * 100,
+            "temporal": np.count_nonzero(((prev >= start) & (pos - prev <= window))[1:]) / total * 100,
+            "alignment": alignment_counts(addr[start:end], ALIGNMENT_SIZES),
+        }
+
+    def q_stride(self, trace, granularity="byte", top_k=10, start=0, end=None):
+        path, _ = self.trace(trace)
+        addr = self.addresses(path)
+        end = len(addr) if end is None else int(end)
+        profile = stride_profile(addr[int(start):end], granularity, int(top_k))
+        profile.pop("histogram")        # full histogram can be huge
+        return profile
+
+    def q_cycles(self, trace, start=0, end=None, top=15, unit="byte"):
+        path, _ = self.trace(trace)
+        prev = self.prev(path, unit)
+        end = len(prev) if end is None else int(end)
+        start = int(start)
+        seg = prev[start:end]
+        seen = np.flatnonzero(seg >= start)
+        lengths = seen + start - seg[seen]
+        values, counts = np.unique(lengths, return_counts=True)
+        order = np.argsort(counts)[::-1][:int(top)]
+        return {"cycles": len(lengths), "top": [(int(values[i]), int(counts[i])) for i in order]}
+
+    def q_working_set(self, trace, tau=1000, unit="page"):
+        path, _ = self.trace(trace)
+        tau = int(tau)
+        ids = self.unit_ids(path, unit)
+        max_tau = min(len(ids), max(MAX_TAU, tau))
+        sizes = self.cache.get(("ws_curve", path, unit, max_tau),
+                               lambda: mean_working_set_curve(ids, max_tau, self.next(path, unit)))
+        faults = self.cache.get(("fault_curve", path, unit, max_tau),
+                                lambda: fault_rate_curve(ids, max_tau, self.prev(path, unit)))
+        tau = min(tau, max_tau)
+        return {"tau": tau, "mean_working_set": float(sizes[tau]), "fault_rate": float(faults[tau]),
+                "bytes": float(sizes[tau]) * (1 << GRANULARITIES[unit])}
+
+    def q_prm(self, trace, window=None, step=None, unit="page"):
+        """Unique pages per prm.py sliding window (W(t, window) at every window end)."""
+        path, _ = self.trace(trace)
+        ids = self.unit_ids(path, unit)
+        window = max(100, len(ids) // 30) if window is None else int(window)
+        step = max(1, window // 10) if step is None else int(step)
+        series = self.cache.get(("ws_series", path, unit, window),
+                                lambda: working_set_series(ids, window, self.prev(path, unit), self.next(path, unit)))
+        ends = np.arange(window - 1, len(ids), step)
+        unique = series[ends]
+        return {"window": window, "step": step, "windows": len(ends),
+                "unique_pages": unique.tolist(), "mean_unique": float(unique.mean()) if len(unique) else 0.0}
+
+    def q_stats(self):
+        return {"traces": list(self.traces), "cache": self.cache.stats()}
+
+    def handle(self, params):
+        metric = params.pop("metric", None)
+        handler = getattr(self, f"q_{metric}", None)
+        if handler is None:
+            raise ValueError(f"unknown metric '{metric}'")
+        return handler(**params)
+
+
+# -----------------------------------------------------------------------------
+# HTTP front end (localhost only): GET /<metric>?trace=...&window=...
+# A relative trace= path is resolved against the server's working directory.
+# -----------------------------------------------------------------------------
+def to_json(value):
+    def default(o):
+        if isinstance(o, np.generic):
+            return o.item()
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        raise TypeError(type(o).__name__)
+    return json.dumps(value, default=default)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            params = {k: v[-1] for k, v in urllib.parse.parse_qs(url.query).items()}
+            params["metric"] = url.path.strip("/")
+            started = time.perf_counter()
+            try:
+                body = {"result": service.handle(params)}
+                status = 200
+            except (ValueError, TypeError, KeyError, OSError) as e:       # bad metric, parameter or trace path
+                body, status = {"error": f"{type(e).__name__}: {e}"}, 400
+            except Exception as e:                                         # analysis failure: still answer
+                traceback.print_exc()
+                body, status = {"error": f"{type(e).__name__}: {e}"}, 500
+            body["seconds"] = time.perf_counter() - started
+            try:
+                data = to_json(body).encode()
+            except (TypeError, ValueError) as e:
+                status = 500
+                data = to_json({"error": f"unserializable result: {e}", "seconds": body["seconds"]}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            print(f"  {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def serve(port=PORT, cache_bytes=CACHE_BYTES):
+    service = AnalysisService(cache_bytes)
+    server = ThreadingHTTPServer((HOST, port), make_handler(service))
+    print(f"Analysis server on http://{HOST}:{port}/  (cache {cache_bytes / 2**20:.0f} MiB)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def query(metric, port=PORT, **params):
+    """
+    Client helper: run one query against a running server and return its JSON answer.
+    A relative trace path is made absolute here, since the server resolves it
+    against its own working directory.
+    """
+    if "trace" in params:
+        params["trace"] = os.path.abspath(params["trace"])
+    url = f"http://{HOST}:{port}/{metric}?{urllib.parse.urlencode(params)}"
+    try:
+        with urllib.request.urlopen(url) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return json.loads(e.read())
+
+
+if __name__ == "__main__":
+    usage = ("Usage:\n"
+             "  python analysis_server.py serve [port] [cache_mb]\n"
+             "  python analysis_server.py query <metric> [port=N] [key=value ...]\n"
+             "  metrics: load, locality, stride, cycles, working_set, prm, stats")
+    if len(sys.argv) < 2:
+        print(usage)
+        sys.exit(1)
+
+    if sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) >= 3 else PORT
+        cache_bytes = int(sys.argv[3]) << 20 if len(sys.argv) >= 4 else CACHE_BYTES
+        serve(port, cache_bytes)
+    elif sys.argv[1] == "query" and len(sys.argv) >= 3:
+        params = dict(arg.split("=", 1) for arg in sys.argv[3:])
+        port = int(params.pop("port", PORT))
+        print(json.dumps(query(sys.argv[2], port, **params), indent=2))
+    else:
+        print(usage)
+        sys.exit(1)
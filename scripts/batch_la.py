@@ -1,15 +1,16 @@
-import subprocess
 import matplotlib.pyplot as plt
 import numpy as np
 import sys
-import re
+from trace_analyze import locality_sweep
 
-if len(sys.argv) != 3:
-    print("Usage: python3 batch_la.py la.py <trace_file>")
+# Legacy form "la.py <trace_file>" is still accepted, the script is ignored:
+# the analysis now runs in-process instead of one subprocess per window size
+args = [a for a in sys.argv[1:] if not a.endswith(".py")]
+if len(args) != 1:
+    print("Usage: python3 batch_la.py <trace_file>")
     sys.exit(1)
 
-script_path = sys.argv[1]  # Path to the analysis script
-trace_file = sys.argv[2]   # Path to the address trace file
+trace_file = args[0]   # Path to the address trace file
 
 # Logarithmic window sizes to test (in a range from 1 to 1000)
 window_sizes = np.logspace(0, 3, num=10, dtype=int)
@@ -21,33 +22,16 @@ temporal_results = []
 # Alignment stats (only need to collect from the first run)
 alignment_stats = {}
 
-# Run the script for each window size
-for idx, window_size in enumerate(window_sizes):
-    result = subprocess.run(["python3", script_path, trace_file, str(window_size)],
-                            capture_output=True, text=True)
-    output_lines = result.stdout.split("\n")
+# Run the analysis for each window size (trace read and interned once)
+for idx, result in enumerate(locality_sweep(trace_file, window_sizes)):
+    spatial_results.append(result["spatial"])
+    temporal_results.append(result["temporal"])
 
-    try:
-        spatial = float(output_lines[0].split(": ")[1].strip('%'))
-        temporal = float(output_lines[2].split(": ")[1].strip('%'))
-
-        spatial_results.append(spatial)
-        temporal_results.append(temporal)
-
-        # On first run collect alignment statistics
-        if idx == 0:
-            alignment_start = output_lines.index("Address Alignment Statistics:")
-            for line in output_lines[alignment_start+1:]:
-                if line.strip() == "":
-                    continue
-                match = re.match(r"\s*Aligned to (\d+)B: \d+ \(([\d\.]+)%\)", line)
-                if match:
-                    align_size = int(match.group(1))
-                    percentage = float(match.group(2))
-                    alignment_stats[align_size] = percentage
-
-    except Exception as e:
-        print(f"Error parsing output for window size {window_size}: {e}")
+    # On first run collect alignment statistics
+    if idx == 0:
+        total = max(result["references"], 1)
+        for align_size, count in result["alignment"].items():
+            alignment_stats[align_size] = count / total * 100
 
 # Plot Locality graph
 plt.figure(figsize=(10, 6))
@@ -0,0 +1,313 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import math
+import os
+import resource
+import subprocess
+import time
+import tracemalloc
+from collections import Counter
+
+import numpy as np
+from synthetic_traces import GENERATORS, generate_trace
+
+RESULTS_FILE = "benchmark_results.jsonl"
+REGRESSION_FACTOR = 1.25        # slower than the best previous run by this -> flagged
+LOCALITY_WINDOW = 100           # window_size passed to analyze_locality
+ALIGNMENT_SIZES = [128, 64, 32, 16, 8, 4, 2]
+
+
+# -----------------------------------------------------------------------------
+# Reference implementations (the existing scripts)
+# Every runner takes a dict describing the trace and returns a canonical result
+# that can be compared against the result of any fast engine.
+# -----------------------------------------------------------------------------
+def ref_locality(trace):
+    from la import analyze_locality
+    result = analyze_locality(trace["text"], LOCALITY_WINDOW, ALIGNMENT_SIZES)
+    return canonical_locality(result)
+
+
+def ref_stride(trace):
+    from sequential_locality_analysis import analyze_sequential_locality
+    hist = analyze_sequential_locality(trace["text"])
+    return {stride: hist[stride] for stride in range(1, 9)}
+
+
+def ref_cycles(trace):
+    from trace_cycles import collect_cycles
+    _, cycles = collect_cycles(trace["text"])
+    return dict(cycles)
+
+
+def ref_graph(trace):
+    from make_graph import build_graph
+    with open(trace["text"]) as f:
+        lines = [line.strip() for line in f if line.strip()]
+    g, _ = build_graph(lines)
+    names = [int(name, 16) for name in g.vs["name"]]
+    edges = Counter((names[s], names[d]) for s, d in g.get_edgelist())
+    return {"vertices": g.vcount(), "edges": dict(edges)}
+
+
+def ref_page_map(trace):
+    import prm
+    pages = prm.read_trace(trace["text"])
+    window, step = page_map_window(len(pages))
+    windows = prm.build_windows(pages, window, step)
+    sorted_pages, matrix = prm.build_presence_matrix(windows)
+    return {"pages": np.asarray(sorted_pages, dtype=np.uint64),
+            "matrix": np.asarray(matrix, dtype=bool)}
+
+
+# -----------------------------------------------------------------------------
+# Fast engines
+# -----------------------------------------------------------------------------
+def interned(trace):
+    """Interning of the binary trace, computed in-process (sidecars not reused)."""
+    from interning import intern_trace
+    return intern_trace(trace["binary"], persist=False)
+
+
+def eng_cycles_interned(trace):
+    from trace_cycles import cycles_from_ids
+    _, ids = interned(trace)
+    return cycles_from_ids(ids)
+
+
+def eng_graph_interned(trace):
+    from make_graph import build_graph_from_ids
+    table, ids = interned(trace)
+    g = build_graph_from_ids(table, ids)
+    names = [int(name, 16) for name in g.vs["name"]]
+    edges = Counter((names[s], names[d]) for s, d in g.get_edgelist())
+    return {"vertices": g.vcount(), "edges": dict(edges)}
+
+
+def eng_graph_sharded(trace):
+    from parallel_graph import sharded_transition_csr
+    from transition_graph import edge_sources
+    table, ids = interned(trace)
+    indptr, indices, weights = sharded_transition_csr(ids, len(table), os.cpu_count(), 1 << 20)
+    src, dst = table[edge_sources(indptr)].tolist(), table[indices].tolist()
+    return {"vertices": len(table), "edges": dict(zip(zip(src, dst), weights.tolist()))}
+
+
+def eng_locality_vectorized(trace):
+    from multi_granularity import analyze_locality_vectorized
+    from trace_io import read_addresses
+    result = analyze_locality_vectorized(read_addresses(trace["binary"]), LOCALITY_WINDOW, ALIGNMENT_SIZES)
+    return canonical_locality(result)
+
+
+def eng_stride_vectorized(trace):
+    from stride_profile import stride_profile
+    from trace_io import read_addresses
+    return stride_profile(read_addresses(trace["binary"]))["forward"]
+
+
+def canonical_locality(result):
+    return {
+        "spatial": result["spatial"],
+        "sequential": result["sequential"],
+        "temporal": result["temporal"],
+        "alignment": {int(k): int(v) for k, v in result["alignment"].items()},
+    }
+
+
+def page_map_window(num_refs):
+    """Same automatic window choice as prm.py."""
+    window = max(100, num_refs // 30)
+    return window, max(1, window // 10)
+
+
+# analysis name -> reference runner and optional fast engines (name -> runner)
+ANALYSES = {
+    "analyze_locality": {"reference": ref_locality, "engines": {"vectorized": eng_locality_vectorized}},
+    "stride_histogram": {"reference": ref_stride,   "engines": {"vectorized": eng_stride_vectorized}},
+    "cycles":           {"reference": ref_cycles,   "engines": {"interned": eng_cycles_interned}},
+    "graph_build":      {"reference": ref_graph,    "engines": {"interned": eng_graph_interned,
+                                                               "sharded": eng_graph_sharded}},
+    "page_map":         {"reference": ref_page_map, "engines": {}},
+}
+
+
+REFERENCE_MODULES = ["la", "sequential_locality_analysis", "trace_cycles", "make_graph", "prm"]
+
+
+def register_engine(analysis, name, runner):
+    """Register a fast engine whose result must match the reference runner."""
+    ANALYSES[analysis]["engines"][name] = runner
+
+
+# -----------------------------------------------------------------------------
+# Result comparison
+# -----------------------------------------------------------------------------
+def same_result(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        if set(a) != set(b):
+            return False
+        return all(same_result(a[k], b[k]) for k in a)
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        a, b = np.asarray(a), np.asarray(b)
+        return a.shape == b.shape and bool(np.all(a == b))
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    return a == b
+
+
+# -----------------------------------------------------------------------------
+# Measurement
+# -----------------------------------------------------------------------------
+def measure(runner, trace, memory=False):
+    """Run once and return (result, seconds, peak_traced_bytes or None)."""
+    peak = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = runner(trace)
+        seconds = time.perf_counter() - start
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                             capture_output=True, text=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_best(history, record):
+    key = ("analysis", "engine", "pattern", "refs")
+    times = [r["seconds"] for r in history
+             if all(r.get(k) == record[k] for k in key) and r.get("seconds")]
+    return min(times) if times else None
+
+
+# -----------------------------------------------------------------------------
+# Benchmark driver
+# -----------------------------------------------------------------------------
+def prepare_trace(workdir, pattern, n, seed=0):
+    """Generate (or reuse) the text and binary form of a synthetic trace."""
+    os.makedirs(workdir, exist_ok=True)
+    stem = os.path.join(workdir, f"{pattern}_{n}")
+    trace = {"pattern": pattern, "refs": n, "text": stem + ".out", "binary": stem + ".bin"}
+    for path in (trace["text"], trace["binary"]):
+        if not os.path.exists(path):
+            generate_trace(pattern, n, path, seed)
+    return trace
+
+
+def run_benchmarks(patterns, sizes, analyses, workdir, results_path,
+                   memory=False, max_reference_refs=10**7):
+    history = load_results(results_path)
+    revision = git_revision()
+
+    # Import the analysis modules up front so import time is not measured
+    for module in REFERENCE_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass     # reported as skipped by the runner
+
+    records = []
+
+    for pattern in patterns:
+        for n in sizes:
+            trace = prepare_trace(workdir, pattern, n)
+            for analysis in analyses:
+                entry = ANALYSES[analysis]
+                runners = [("reference", entry["reference"])] if n <= max_reference_refs else []
+                runners += sorted(entry["engines"].items())
+
+                reference_result = None
+                for engine, runner in runners:
+                    record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "revision": revision,
+                              "analysis": analysis, "engine": engine, "pattern": pattern, "refs": n}
+                    try:
+                        result, seconds, _ = measure(runner, trace)
+                        if memory:
+                            _, _, record["peak_traced_bytes"] = measure(runner, trace, memory=True)
+                    except ImportError as e:
+                        record["skipped"] = str(e)
+                        print(f"  {analysis:17s} {engine:10s} skipped ({e})")
+                        records.append(record)
+                        continue
+
+                    record["seconds"] = seconds
+                    record["refs_per_sec"] = n / seconds if seconds > 0 else None
+                    record["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+                    if engine == "reference":
+                        reference_result = result
+                    elif reference_result is not None:
+                        record["matches_reference"] = same_result(reference_result, result)
+
+                    best = previous_best(history, record)
+                    record["regression"] = bool(best and seconds > best * REGRESSION_FACTOR)
+
+                    flags = []
+                    if record.get("matches_reference") is False:
+                        flags.append("MISMATCH")
+                    if record["regression"]:
+                        flags.append(f"REGRESSION (best {best:.3f}s)")
+                    mem = f"  peak={record['peak_traced_bytes'] / 2**20:.1f}MiB" if memory else ""
+                    print(f"  {analysis:17s} {engine:10s} {pattern:10s} n={n:<11,d} "
+                          f"{seconds:9.3f}s{mem}  {' '.join(flags)}")
+                    records.append(record)
+
+    with open(results_path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    return records
+
+
+def parse_sizes(text):
+    return [int(float(s)) for s in text.split(",") if s]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the trace analyses on synthetic traces.")
+    parser.add_argument("--patterns", default=",".join(GENERATORS),
+                        help="comma separated trace patterns")
+    parser.add_argument("--sizes", default="1e5,1e6",
+                        help="comma separated trace lengths (e.g. 1e5,1e6,1e9)")
+    parser.add_argument("--analyses", default=",".join(ANALYSES),
+                        help="comma separated analyses")
+    parser.add_argument("--workdir", default="bench_traces",
+                        help="directory for generated traces")
+    parser.add_argument("--results", default=RESULTS_FILE,
+                        help="JSON lines file that accumulates results")
+    parser.add_argument("--memory", action="store_true",
+                        help="additionally measure peak allocations with tracemalloc")
+    parser.add_argument("--max-reference-refs", type=float, default=1e7,
+                        help="skip the slow reference implementations above this size")
+    args = parser.parse_args()
+
+    run_benchmarks(
+        patterns=[p for p in args.patterns.split(",") if p],
+        sizes=parse_sizes(args.sizes),
+        analyses=[a for a in args.analyses.split(",") if a],
+        workdir=args.workdir,
+        results_path=args.results,
+        memory=args.memory,
+        max_reference_refs=int(args.max_reference_refs),
+    )
+    print(f"\nResults appended to '{args.results}'.")
@@ -1,12 +1,10 @@
 import sys
 from collections import Counter
-from igraph import Graph
-import matplotlib.pyplot as plt
 
 # ---------------------------------------------------------------------------
 # Compute degree sequences for the graph
 # ---------------------------------------------------------------------------
-def degree_histograms(g: Graph):
+def degree_histograms(g):
     indeg = g.degree(mode="IN")     # number of incoming edges per vertex
     outdeg = g.degree(mode="OUT")   # number of outgoing edges per vertex
     total = g.degree(mode="ALL")    # sum of in + out degrees
@@ -34,6 +32,8 @@ def print_top_vertices(g, degrees, mode_name, top=15):
 # - full range view
 # ---------------------------------------------------------------------------
 def plot_hist_full(degrees, title, xlabel, zoom_max=50):
+    import matplotlib.pyplot as plt     # loaded only when plotting
+
     hist = Counter(degrees)     # histogram: degree -> count of vertices
     total_vertices = len(degrees)
     x = sorted(hist.keys())     # all degree values present in the graph
@@ -91,6 +91,7 @@ def main():
     graph_path = sys.argv[1]
 
     # Load graph produced from itrace
+    from igraph import Graph
     try:
         g = Graph.Read_GraphML(graph_path)
     except Exception as e:
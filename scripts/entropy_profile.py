@@ -0,0 +1,199 @@
+import sys
+import numpy as np
+from interning import load_interning
+from multi_granularity import GRANULARITIES, coarsen
+from trace_io import iter_address_blocks
+
+# -----------------------------------------------------------------------------
+# Predictability of the address stream: order-k Markov conditional entropy
+#   H(X_t | X_{t-k}, ..., X_{t-1}) = H_{k+1} - H_k
+# where H_n is the plug-in entropy of the n-grams ending at t (all orders use
+# the same positions t >= max_order, H_0 = 0). n-grams are folded into 64-bit
+# hashes and counted with np.unique, for the address stream and for the
+# delta (stride) stream at every granularity. 0 bits = fully predictable from
+# the last k units, log2(#distinct units) = no better than random.
+# The streaming mode reads the trace block by block and keeps, per order,
+# the counts of the distinct 64-bit n-gram hashes (sorted keys, merged when
+# the pending block counts outgrow the table). Its H_n are exact up to 64-bit
+# hash collisions (chance of any collision about D^2 / 2^65 for D distinct
+# n-grams), and memory grows with the distinct n-grams, not the trace length.
+# When an order exceeds its share of memory_budget (max_keys distinct keys),
+# its keys are truncated one bit at a time until they fit: merged n-grams
+# make that H_n too low, by at most the merged probability mass times
+# log2(n-grams per key), and the conditional entropies built from it can be
+# off in either direction. Such orders are reported with their key bits.
+# -----------------------------------------------------------------------------
+MAX_ORDER = 4
+MEMORY_BUDGET = 2 << 30     # bytes for all streaming counters together
+BYTES_PER_KEY = 48          # key + count, plus the merge temporaries
+HASH_MULT = np.uint64(0x9E3779B97F4A7C15)
+HASH_SEED = np.uint64(0x2545F4914F6CDD1D)
+STREAMS = ("address", "delta")
+
+
+# -----------------------------------------------------------------------------
+# n-gram hashing and entropies
+# -----------------------------------------------------------------------------
+def ngram_hashes(values, n, start):
+    """64-bit hashes of the n-grams values[t-n+1..t] for t = start..len-1."""
+    values = np.asarray(values).astype(np.uint64)
+    h = np.zeros(len(values) - start, dtype=np.uint64)
+    for j in range(n):      # oldest element first
+        v = values[start - n + 1 + j:len(values) - n + 1 + j]
+        h = (h ^ (v + HASH_SEED)) * HASH_MULT
+        h ^= h >> np.uint64(31)
+    return h
+
+
+def entropy_from_counts(counts):
+    """Plug-in entropy (bits) of a histogram."""
+    counts = np.asarray(counts, dtype=np.float64)
+    counts = counts[counts > 0]
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    return float(np.log2(total) - (counts * np.log2(counts)).sum() / total)
+
+
+def conditional_entropies(block_entropies):
+    """[H(X | k previous)] for k = 0..len-2 from block entropies H_1, H_2, ..."""
+    h = np.concatenate(([0.0], block_entropies))
+    return np.diff(h).tolist()
+
+
+def exact_conditional_entropy(ids, max_order=MAX_ORDER):
+    """Conditional entropies k = 0..max_order of an (interned) id stream."""
+    if len(ids) <= max_order:
+        return [0.0] * (max_order + 1)
+    blocks = [entropy_from_counts(np.unique(ngram_hashes(ids, n, max_order), return_counts=True)[1])
+              for n in range(1, max_order + 2)]
+    return conditional_entropies(blocks)
+
+
+def exact_profile(table, ids, max_order=MAX_ORDER, granularities=GRANULARITIES):
+    """{granularity: {"address": [H_0..H_k], "delta": [...], "distinct": n}} from the interning."""
+    ids = np.asarray(ids)
+    results = {}
+    for name, shift in granularities.items():
+        unit_table, unit_ids = coarsen(table, ids, shift)
+        deltas = np.diff(unit_table[unit_ids].astype(np.int64))
+        delta_ids = np.unique(deltas, return_inverse=True)[1]
+        results[name] = {
+            "address": exact_conditional_entropy(unit_ids, max_order),
+            "delta": exact_conditional_entropy(delta_ids, max_order),
+            "distinct": len(unit_table),
+        }
+    return results
+
+
+# -----------------------------------------------------------------------------
+# Streaming approximation
+# -----------------------------------------------------------------------------
+class NgramCounts:
+    """
+    Counts of the n-gram hashes (n = 1..max_order+1) of a value stream fed in
+    blocks, at most max_keys distinct keys per order (see the header).
+    """
+
+    def __init__(self, max_order=MAX_ORDER, max_keys=None):
+        if max_keys is not None and max_keys < 2:
+            raise ValueError(f"max_keys must be at least 2, got {max_keys}")
+        self.max_order = max_order
+        self.max_keys = max_keys
+        self.bits = [64] * (max_order + 1)
+        self.keys = [np.zeros(0, dtype=np.uint64) for _ in range(max_order + 1)]
+        self.counts = [np.zeros(0, dtype=np.int64) for _ in range(max_order + 1)]
+        self.pending = [[] for _ in range(max_order + 1)]
+        self.tail = np.zeros(0, dtype=np.uint64)      # last max_order values of the previous block
+
+    def update(self, values):
+        values = np.concatenate((self.tail, np.asarray(values).astype(np.uint64)))
+        if len(values) > self.max_order:
+            for n in range(1, self.max_order + 2):
+                h = ngram_hashes(values, n, self.max_order)
+                if self.bits[n - 1] < 64:
+                    h >>= np.uint64(64 - self.bits[n - 1])
+                self.pending[n - 1].append(np.unique(h, return_counts=True))
+                if sum(len(k) for k, _ in self.pending[n - 1]) >= max(len(self.keys[n - 1]), 1 << 16):
+                    self._merge(n - 1)
+        self.tail = values[-self.max_order:] if self.max_order else values[:0]
+
+    def _merge(self, o):
+        """Fold the pending block counts of order o into its table, truncating keys to max_keys."""
+        parts = [(self.keys[o], self.counts[o])] + self.pending[o]
+        self.pending[o] = []
+        keys, inverse = np.unique(np.concatenate([k for k, _ in parts]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([c for _, c in parts])).astype(np.int64)
+        while self.max_keys is not None and len(keys) > self.max_keys:
+            self.bits[o] -= 1
+            keys >>= np.uint64(1)                   # still sorted: merge equal neighbours
+            first = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+            keys, counts = keys[first], np.add.reduceat(counts, first)
+        self.keys[o], self.counts[o] = keys, counts
+
+    def conditional_entropies(self):
+        for o in range(self.max_order + 1):
+            self._merge(o)
+        return conditional_entropies([entropy_from_counts(c) for c in self.counts])
+
+
+def streaming_profile(trace_file, max_order=MAX_ORDER, memory_budget=MEMORY_BUDGET,
+                      granularities=GRANULARITIES):
+    """
+    Same table as exact_profile from one streamed pass, plus "key_bits":
+    {stream: key bits per order} (64 = exact up to hash collisions).
+    """
+    num_counters = len(granularities) * len(STREAMS) * (max_order + 1)
+    max_keys = memory_budget // (BYTES_PER_KEY * num_counters)
+    if max_keys < 2:
+        raise ValueError(f"memory budget {memory_budget:,} B is too small for {num_counters} n-gram counters "
+                         f"(needs at least {2 * BYTES_PER_KEY * num_counters:,} B)")
+    counters = {(name, stream): NgramCounts(max_order, max_keys)
+                for name in granularities for stream in STREAMS}
+    last = {}                                       # last unit of the previous block (for deltas)
+    for block in iter_address_blocks(trace_file):
+        for name, shift in granularities.items():
+            units = (block >> np.uint64(shift)).astype(np.int64)
+            counters[name, "address"].update(units)
+            joined = units if name not in last else np.concatenate((last[name], units))
+            counters[name, "delta"].update(np.diff(joined))
+            last[name] = units[-1:]
+    results = {}
+    for name in granularities:
+        results[name] = {stream: counters[name, stream].conditional_entropies() for stream in STREAMS}
+        results[name]["key_bits"] = {stream: list(counters[name, stream].bits) for stream in STREAMS}
+    return results
+
+
+def print_profile(results, max_order=MAX_ORDER):
+    header = "".join(f"{f'k={k}':>8s}" for k in range(max_order + 1))
+    print("Conditional entropy H(X_t | k previous) in bits")
+    print(f"  {'granularity':<10s} {'stream':<8s}{header}")
+    for name, row in results.items():
+        for stream in STREAMS:
+            print(f"  {name:<10s} {stream:<8s}" + "".join(f"{h:8.3f}" for h in row[stream]))
+    for name, row in results.items():
+        for stream, bits in row.get("key_bits", {}).items():
+            if min(bits) < 64:
+                print(f"  approximate: {name} {stream} n-gram keys truncated to {bits} bits (n = 1..{len(bits)})")
+
+
+if __name__ == "__main__":
+    streaming = "--stream" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--stream"]
+    if len(args) not in [1, 2, 3]:
+        print("Usage: python entropy_profile.py <trace_file> [max_order] [memory_mb] [--stream]")
+        sys.exit(1)
+
+    trace_file = args[0]
+    max_order = int(args[1]) if len(args) >= 2 else MAX_ORDER
+    memory_budget = int(args[2]) << 20 if len(args) == 3 else MEMORY_BUDGET
+
+    if streaming:
+        results = streaming_profile(trace_file, max_order, memory_budget)
+        print(f"Streaming ({memory_budget >> 20:,} MiB for the n-gram counts)")
+    else:
+        table, ids = load_interning(trace_file)
+        results = exact_profile(table, ids, max_order)
+        print(f"References: {len(ids):,}")
+    print_profile(results, max_order)
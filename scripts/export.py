@@ -0,0 +1,208 @@
+import os
+import sys
+import tempfile
+import numpy as np
+from interning import load_interning, previous_occurrence
+from multi_granularity import ALIGNMENT_SIZES, GRANULARITIES, analyze_locality_vectorized
+from stride_profile import GRANULARITY_SHIFTS, stride_histogram, to_units
+from trace_io import BLOCK_SIZE
+
+# -----------------------------------------------------------------------------
+# Typed columnar export of the analysis results (Parquet, or Arrow IPC for
+# .arrow/.feather paths). Every table carries a dictionary-encoded "trace"
+# column, so results of several traces can be concatenated and queried together:
+#   locality      trace, window_size, spatial, sequential, temporal, align_<N>B
+#   strides       trace, granularity, stride, count
+#   cycles        trace, cycle_length, count
+#   degrees       trace, address, in_degree, out_degree, total_degree
+#   page_windows  trace, window, page        (prm.py presence matrix as COO)
+#   references    trace, position, address, page, region, reuse_distance
+# pyarrow is optional for the rest of the scripts and only required here.
+# -----------------------------------------------------------------------------
+LOCALITY_WINDOWS = np.logspace(0, 3, num=10, dtype=int)     # batch_la.py sweep
+PAGE_SHIFT = GRANULARITIES["page"]
+
+
+def require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("export.py needs pyarrow (pip install pyarrow)") from e
+    return pa, pq
+
+
+def trace_column(name, n):
+    pa, _ = require_pyarrow()
+    return pa.DictionaryArray.from_arrays(pa.array(np.zeros(n, dtype=np.int32)), pa.array([name]))
+
+
+def make_table(trace_name, columns):
+    """Arrow table from numpy columns (dtypes are kept), prefixed by the trace column."""
+    pa, _ = require_pyarrow()
+    n = len(next(iter(columns.values()))) if columns else 0
+    arrays = {"trace": trace_column(trace_name, n)}
+    arrays.update({k: v if isinstance(v, pa.Array) else pa.array(v) for k, v in columns.items()})
+    return pa.table(arrays)
+
+
+def write_table(table, path):
+    pa, pq = require_pyarrow()
+    if path.endswith((".arrow", ".feather")):
+        table = table.unify_dictionaries()      # IPC files allow one dictionary per column
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, path)
+
+
+# -----------------------------------------------------------------------------
+# Result tables
+# -----------------------------------------------------------------------------
+def locality_table(name, addresses, window_sizes=LOCALITY_WINDOWS, alignment_sizes=ALIGNMENT_SIZES, ids=None):
+    """batch_la.py sweep; the interning (ids) and previous occurrences are shared by all window sizes."""
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    ids = np.unique(addresses, return_inverse=True)[1] if ids is None else np.asarray(ids)
+    prev = previous_occurrence(ids)
+    rows = [analyze_locality_vectorized(addresses, int(w), alignment_sizes, ids, prev) for w in window_sizes]
+    columns = {
+        "window_size": np.asarray(window_sizes, dtype=np.int64),
+        "spatial": np.array([r["spatial"] for r in rows]),
+        "sequential": np.array([r["sequential"] for r in rows]),
+        "temporal": np.array([r["temporal"] for r in rows]),
+    }
+    for align in alignment_sizes:
+        columns[f"align_{align}B"] = np.array([r["alignment"][align] for r in rows], dtype=np.int64)
+    return make_table(name, columns)
+
+
+def stride_table(name, addresses, granularities=tuple(GRANULARITY_SHIFTS)):
+    pa, _ = require_pyarrow()
+    parts = []
+    for granularity in granularities:
+        values, counts = stride_histogram(np.diff(to_units(addresses, granularity)))
+        parts.append(make_table(name, {
+            "granularity": pa.DictionaryArray.from_arrays(
+                pa.array(np.zeros(len(values), dtype=np.int32)), pa.array([granularity])),
+            "stride": values.astype(np.int64),
+            "count": counts.astype(np.int64),
+        }))
+    return pa.concat_tables(parts, promote_options="permissive")
+
+
+def cycles_table(name, ids):
+    prev = previous_occurrence(ids)
+    seen = np.flatnonzero(prev >= 0)
+    values, counts = np.unique(seen - prev[seen], return_counts=True)
+    return make_table(name, {"cycle_length": values.astype(np.int64), "count": counts.astype(np.int64)})
+
+
+def degrees_table(name, table, ids):
+    """Vertex degrees of the make_graph.py transition multigraph."""
+    ids = np.asarray(ids, dtype=np.int64)
+    indeg = np.bincount(ids[1:], minlength=len(table))
+    outdeg = np.bincount(ids[:-1], minlength=len(table))
+    return make_table(name, {"address": table, "in_degree": indeg, "out_degree": outdeg,
+                             "total_degree": indeg + outdeg})
+
+
+def page_windows_table(name, trace_file, window_size=None, slide_step=None, num_refs=None, work_dir=None):
+    """
+    prm.py windows as (window, page) pairs, built through the out-of-core column
+    store in a temporary directory under work_dir (default: the system temp dir).
+    """
+    from prm_ooc import write_window_columns, open_columns
+    window_size = window_size or max(100, (num_refs or 0) // 30)
+    slide_step = slide_step or max(1, window_size // 10)
+    with tempfile.TemporaryDirectory(prefix="prm_", dir=work_dir) as store_dir:
+        write_window_columns(trace_file, store_dir, window_size, slide_step)
+        colptr, pages = open_columns(store_dir)
+        windows = np.repeat(np.arange(len(colptr) - 1, dtype=np.int64), np.diff(colptr))
+        pages = np.array(pages, dtype=np.uint64)    # copy out of the store before it is removed
+        del colptr
+    return make_table(name, {"window": windows, "page": pages})
+
+
+def write_references(name, table, ids, path, map_file=None, block_size=BLOCK_SIZE):
+    """Per-reference derived columns, written in row groups of block_size references."""
+    pa, pq = require_pyarrow()
+    ids = np.asarray(ids)
+    prev = previous_occurrence(ids)
+    labels = region_names = None
+    if map_file:
+        from regions import REGION_NAMES, label_trace
+        labels, region_names = label_trace(table, ids, map_file), pa.array(REGION_NAMES)
+
+    writer = None
+    try:
+        for start in range(0, len(ids), block_size):
+            stop = min(start + block_size, len(ids))
+            addresses = table[ids[start:stop]]
+            positions = np.arange(start, stop, dtype=np.int64)
+            columns = {
+                "position": positions,
+                "address": addresses,
+                "page": addresses >> np.uint64(PAGE_SHIFT),
+                "reuse_distance": np.where(prev[start:stop] >= 0, positions - prev[start:stop], -1),
+            }
+            if labels is not None:
+                columns["region"] = pa.DictionaryArray.from_arrays(
+                    pa.array(labels[start:stop].astype(np.int32)), region_names)
+            batch = make_table(name, columns)
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema)
+            writer.write_table(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+# -----------------------------------------------------------------------------
+# Export of several traces into one directory
+# -----------------------------------------------------------------------------
+def export_traces(trace_files, out_dir, map_file=None, references=False, extension=".parquet"):
+    pa, _ = require_pyarrow()
+    os.makedirs(out_dir, exist_ok=True)
+    tables = {"locality": [], "strides": [], "cycles": [], "degrees": [], "page_windows": []}
+    written = []
+    for trace_file in trace_files:
+        name = os.path.basename(trace_file)
+        table, ids = load_interning(trace_file)
+        ids = np.asarray(ids)
+        addresses = table[ids]
+        tables["locality"].append(locality_table(name, addresses, ids=ids))
+        tables["strides"].append(stride_table(name, addresses))
+        tables["cycles"].append(cycles_table(name, ids))
+        tables["degrees"].append(degrees_table(name, table, ids))
+        tables["page_windows"].append(page_windows_table(name, trace_file, num_refs=len(ids), work_dir=out_dir))
+        if references:
+            path = os.path.join(out_dir, f"references_{name}.parquet")
+            write_references(name, table, ids, path, map_file)
+            written.append(path)
+
+    for key, parts in tables.items():
+        path = os.path.join(out_dir, key + extension)
+        write_table(pa.concat_tables(parts, promote_options="permissive"), path)
+        written.append(path)
+    return written
+
+
+if __name__ == "__main__":
+    references = "--refs" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--refs"]
+    map_file = None
+    if "--map" in args:
+        i = args.index("--map")
+        map_file = args[i + 1] if i + 1 < len(args) else None
+        del args[i:i + 2]
+    extension = ".parquet"
+    if "--arrow" in args:
+        args.remove("--arrow")
+        extension = ".arrow"
+    if len(args) < 2:
+        print("Usage: python export.py <output_dir> <trace_file> [trace_file ...] "
+              "[--refs] [--map memory_map_file] [--arrow]")
+        sys.exit(1)
+
+    for path in export_traces(args[1:], args[0], map_file, references, extension):
+        print(f"  {path}")
@@ -1,5 +1,8 @@
 import sys
 from collections import defaultdict
+import numpy as np
+from interning import load_interning, format_address
+from make_graph import pop_workers
 
 def read_addresses(filename):
     with open(filename, 'r') as f:
@@ -20,17 +23,58 @@ def write_adjacency_list(graph, filename):
             neighbors_str = ' '.join([f"{dst}({weight})" for dst, weight in neighbors])
             f.write(f"{node}: {neighbors_str}\n")
 
+def write_adjacency_from_ids(table, ids, filename):
+    """
+    Write the same adjacency list as build_adjacency_list + write_adjacency_list,
+    working on interned ids: nodes in order of first appearance as a source,
+    neighbors in trace order.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    src, dst = ids[:-1], ids[1:]
+    order = np.argsort(src, kind="stable")
+    src_sorted, dst_sorted = src[order], dst[order]
+
+    nodes, first_pos = np.unique(src, return_index=True)
+    starts = np.searchsorted(src_sorted, nodes, side="left")
+    ends = np.searchsorted(src_sorted, nodes, side="right")
+    names = [format_address(addr) for addr in table.tolist()]
+
+    with open(filename, 'w') as f:
+        for k in np.argsort(first_pos).tolist():
+            neighbors = dst_sorted[starts[k]:ends[k]].tolist()
+            neighbors_str = ' '.join([f"{names[d]}(1)" for d in neighbors])
+            f.write(f"{names[nodes[k]]}: {neighbors_str}\n")
+
+def write_weighted_adjacency(table, indptr, indices, weights, filename):
+    """
+    Aggregated adjacency list from the transition CSR: one neighbor per
+    distinct transition with its count as the weight, nodes and neighbors
+    in address order.
+    """
+    names = [format_address(addr) for addr in table.tolist()]
+    with open(filename, 'w') as f:
+        for v in np.flatnonzero(np.diff(indptr)).tolist():
+            lo, hi = indptr[v], indptr[v + 1]
+            neighbors_str = ' '.join([f"{names[d]}({w})" for d, w in
+                                      zip(indices[lo:hi].tolist(), weights[lo:hi].tolist())])
+            f.write(f"{names[v]}: {neighbors_str}\n")
+
 def main():
+    workers = pop_workers(sys.argv)
     if len(sys.argv) != 3:
-        print("Usage: python3 generate_graph.py <input_file> <output_file>")
+        print("Usage: python3 generate_graph.py <input_file> <output_file> [--workers N]")
+        print("  --workers N: aggregated weights per distinct transition, counted by N processes")
         sys.exit(1)
 
     input_file = sys.argv[1]
     output_file = sys.argv[2]
 
-    addresses = read_addresses(input_file)
-    graph = build_adjacency_list(addresses)
-    write_adjacency_list(graph, output_file)
+    table, ids = load_interning(input_file)
+    if workers:
+        from parallel_graph import sharded_transition_csr
+        write_weighted_adjacency(table, *sharded_transition_csr(ids, len(table), workers), output_file)
+    else:
+        write_adjacency_from_ids(table, ids, output_file)
 
     print(f"Graph printed in '{output_file}'.")
 
@@ -0,0 +1,133 @@
+import os
+import sys
+import numpy as np
+from trace_io import BLOCK_SIZE, iter_address_blocks, read_addresses
+
+TABLE_SUFFIX = ".table.npy"     # sorted unique addresses (uint64)
+IDS_SUFFIX = ".ids.npy"         # dense id per reference, index into the table
+
+
+# -----------------------------------------------------------------------------
+# Interning: address -> dense integer id
+# -----------------------------------------------------------------------------
+def id_dtype(num_unique):
+    return np.uint32 if num_unique < 2**32 else np.uint64
+
+
+def intern_addresses(addresses):
+    """Return (table, ids): sorted unique addresses and the id of every reference."""
+    table, ids = np.unique(np.asarray(addresses, dtype=np.uint64), return_inverse=True)
+    return table, ids.astype(id_dtype(len(table)), copy=False)
+
+
+def sidecar_paths(trace_path):
+    return trace_path + TABLE_SUFFIX, trace_path + IDS_SUFFIX
+
+
+def merge_block_uniques(blocks):
+    """
+    (sorted unique addresses, number of references) of a stream of blocks.
+    Block uniques are merged pairwise like a binary counter: runs of equal
+    rank are unioned, so no table is re-sorted once per block.
+    """
+    stack = []      # (rank, sorted unique addresses), ranks strictly decreasing
+    total = 0
+    for block in blocks:
+        total += len(block)
+        rank, merged = 0, np.unique(block)
+        while stack and stack[-1][0] == rank:
+            merged = np.union1d(stack.pop()[1], merged)
+            rank += 1
+        stack.append((rank, merged))
+    table = np.zeros(0, dtype=np.uint64)
+    for _, part in reversed(stack):     # smallest parts first
+        table = np.union1d(table, part)
+    return table.astype(np.uint64, copy=False), total
+
+
+def build_interning(trace_path, block_size=BLOCK_SIZE):
+    """
+    Stream the trace twice and persist the interning next to it:
+      pass 1 - merge per-block unique addresses into the sorted table
+               (binary merge tree, so each address is re-sorted O(log blocks) times)
+      pass 2 - map every block onto the table and append to the ids file
+    Only one block plus the table is held in memory.
+    """
+    table_path, ids_path = sidecar_paths(trace_path)
+
+    table, total = merge_block_uniques(iter_address_blocks(trace_path, block_size))
+    np.save(table_path, table)
+
+    ids = np.lib.format.open_memmap(ids_path, mode="w+", dtype=id_dtype(len(table)), shape=(total,))
+    pos = 0
+    for block in iter_address_blocks(trace_path, block_size):
+        ids[pos:pos + len(block)] = np.searchsorted(table, block)
+        pos += len(block)
+    ids.flush()
+    del ids
+
+    return load_interning(trace_path, rebuild=False)
+
+
+def load_interning(trace_path, rebuild=None, mmap=True):
+    """
+    Return (table, ids) for a trace, building the sidecar files when missing
+    or older than the trace. rebuild=True forces, rebuild=False never builds.
+    """
+    table_path, ids_path = sidecar_paths(trace_path)
+    if rebuild is None:
+        trace_mtime = os.path.getmtime(trace_path)
+        rebuild = not all(os.path.exists(p) and os.path.getmtime(p) >= trace_mtime
+                          for p in (table_path, ids_path))
+    if rebuild:
+        return build_interning(trace_path)
+
+    mode = "r" if mmap else None
+    return np.load(table_path), np.load(ids_path, mmap_mode=mode)
+
+
+def intern_trace(trace_path, persist=True):
+    """Interning of a trace: persisted sidecars when allowed, in-memory otherwise."""
+    if persist:
+        return load_interning(trace_path)
+    return intern_addresses(read_addresses(trace_path))
+
+
+# -----------------------------------------------------------------------------
+# Occurrence helpers shared by the id-based analyses
+# -----------------------------------------------------------------------------
+def previous_occurrence(ids):
+    """Index of the previous reference to the same id (-1 for the first one)."""
+    ids = np.asarray(ids)
+    order = np.argsort(ids, kind="stable")
+    prev = np.full(len(ids), -1, dtype=np.int64)
+    same = ids[order[1:]] == ids[order[:-1]]
+    prev[order[1:][same]] = order[:-1][same]
+    return prev
+
+
+def next_occurrence(ids):
+    """Index of the next reference to the same id (len(ids) for the last one)."""
+    ids = np.asarray(ids)
+    order = np.argsort(ids, kind="stable")
+    nxt = np.full(len(ids), len(ids), dtype=np.int64)
+    same = ids[order[1:]] == ids[order[:-1]]
+    nxt[order[:-1][same]] = order[1:][same]
+    return nxt
+
+
+def format_address(addr):
+    return f"0x{int(addr):x}"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python interning.py <trace_file>")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    table, ids = load_interning(trace_file, rebuild=True)
+    table_path, ids_path = sidecar_paths(trace_file)
+    print(f"References: {len(ids):,}")
+    print(f"Unique addresses: {len(table):,} (ids stored as {ids.dtype})")
+    print(f"Wrote:\n  {table_path}\n  {ids_path}")
@@ -71,6 +71,13 @@ def analyze_locality(file_path, window_size, alignment_sizes):
         percentage = (count / total_accesses) * 100
         print(f"  Aligned to {align}B: {count} ({percentage:.2f}%)")
 
+    return {
+        "spatial": spatial_locality,
+        "sequential": sequential_locality,
+        "temporal": temporal_locality,
+        "alignment": {align: alignment_counts[align] for align in alignment_sizes},
+    }
+
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python locality_principles_analysis.py <input_file> <window_size>")
@@ -0,0 +1,136 @@
+import sys
+import numpy as np
+from interning import load_interning, previous_occurrence
+from multi_granularity import ALIGNMENT_SIZES, GRANULARITIES, coarsen
+from working_set import working_set_series
+
+# -----------------------------------------------------------------------------
+# Locality per sliding window, with prm.py's window semantics: windows of
+# window_size references starting at 0, slide_step, 2*slide_step, ... (full
+# windows only). Every reference gets la.py indicators once; window sums are
+# differences of their cumulative sums, so any number of windows costs O(N).
+#   spatial / sequential - pairs (i-1, i) with both references in the window
+#   temporal             - reference reused within locality_window references
+#   unique_pages         - W(t, window_size) at the window's last reference
+#   alignment            - share of references per largest alignment (la.py order)
+# Percentages are relative to window_size, as la.py divides by all references.
+# -----------------------------------------------------------------------------
+LOCALITY_WINDOW = 100       # la.py's window_size: spatial distance (bytes) and reuse distance (references)
+PAGE_SHIFT = GRANULARITIES["page"]
+
+
+def window_starts(n, window_size, slide_step):
+    return np.arange(0, max(n - window_size + 1, 0), slide_step)
+
+
+def window_sums(indicator, starts, window_size, offset=0):
+    """Sum of indicator[s + offset : s + window_size] for every window start s."""
+    c = np.concatenate(([0], np.cumsum(indicator, dtype=np.int64)))
+    return c[starts + window_size] - c[starts + offset]
+
+
+def alignment_classes(addresses, alignment_sizes=ALIGNMENT_SIZES):
+    """Index of the largest alignment each address satisfies (len(alignment_sizes) = none)."""
+    classes = np.full(len(addresses), len(alignment_sizes), dtype=np.int8)
+    for i, align in reversed(list(enumerate(alignment_sizes))):
+        classes[addresses % np.uint64(align) == 0] = i
+    return classes
+
+
+def locality_timeseries(table, ids, window_size, slide_step, locality_window=LOCALITY_WINDOW,
+                        alignment_sizes=ALIGNMENT_SIZES):
+    ids = np.asarray(ids)
+    addresses = table[ids]
+    starts = window_starts(len(ids), window_size, slide_step)
+    percent = 100.0 / window_size
+
+    diff = np.diff(addresses.astype(np.int64), prepend=np.int64(addresses[0]) if len(addresses) else 0)
+    prev = previous_occurrence(ids)
+    spatial = np.abs(diff) <= locality_window
+    sequential = (diff > 0) & (diff <= 8)
+    temporal = (prev >= 0) & (np.arange(len(ids)) - prev <= locality_window)
+
+    _, page_ids = coarsen(table, ids, PAGE_SHIFT)
+    unique_pages = working_set_series(page_ids, window_size)[starts + window_size - 1]
+
+    classes = alignment_classes(addresses, alignment_sizes)
+    alignment = {align: window_sums(classes == i, starts, window_size) * percent
+                 for i, align in enumerate(alignment_sizes)}
+
+    return {
+        "start": starts,
+        "spatial": window_sums(spatial, starts, window_size, 1) * percent,
+        "sequential": window_sums(sequential, starts, window_size, 1) * percent,
+        "temporal": window_sums(temporal, starts, window_size) * percent,
+        "unique_pages": unique_pages,
+        "alignment": alignment,
+    }
+
+
+def write_tsv(series, path):
+    aligns = list(series["alignment"])
+    with open(path, "w") as out:
+        out.write("window\tstart\tspatial\tsequential\ttemporal\tunique_pages\t"
+                  + "\t".join(f"align_{a}B" for a in aligns) + "\n")
+        for w, start in enumerate(series["start"].tolist()):
+            row = [series[k][w] for k in ("spatial", "sequential", "temporal")]
+            row += [series["alignment"][a][w] for a in aligns]
+            out.write(f"{w}\t{start}\t" + "\t".join(f"{v:.2f}" for v in row[:3])
+                      + f"\t{series['unique_pages'][w]}\t" + "\t".join(f"{v:.2f}" for v in row[3:]) + "\n")
+
+
+def plot_timeseries(series, trace_file, window_size, slide_step):
+    import matplotlib.pyplot as plt
+
+    x = np.arange(len(series["start"]))
+    fig, axes = plt.subplots(3, 1, figsize=(10, 9), sharex=True)
+    for key in ("spatial", "sequential", "temporal"):
+        axes[0].plot(x, series[key], linewidth=0.8, label=key.capitalize())
+    axes[0].set_ylabel("Locality (%)")
+    axes[0].legend(fontsize=8)
+    axes[0].set_title(f"Locality per window for {trace_file}\n(WINDOW={window_size}, STEP={slide_step})")
+
+    axes[1].plot(x, series["unique_pages"], linewidth=0.8, color="#1f77b4")
+    axes[1].set_ylabel("Unique pages")
+
+    bottom = np.zeros(len(x))
+    for align, values in series["alignment"].items():
+        axes[2].fill_between(x, bottom, bottom + values, step="mid", label=f"{align}B", linewidth=0)
+        bottom += values
+    axes[2].set_ylabel("Aligned accesses (%)")
+    axes[2].set_xlabel("Sliding Window Index")
+    axes[2].legend(fontsize=7, ncol=len(series["alignment"]), loc="upper left")
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    plot = "--plot" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--plot"]
+    if len(args) not in [1, 2, 3]:
+        print("Usage: python locality_timeseries.py <trace_file> [window_size] [locality_window] [--plot]")
+        sys.exit(1)
+
+    trace_file = args[0]
+    table, ids = load_interning(trace_file)
+    window_size = int(args[1]) if len(args) >= 2 else max(100, len(ids) // 30)     # prm.py default
+    slide_step = max(1, window_size // 10)
+    locality_window = int(args[2]) if len(args) == 3 else LOCALITY_WINDOW
+
+    series = locality_timeseries(table, ids, window_size, slide_step, locality_window)
+    if len(series["start"]) == 0:
+        print("No windows created (trace may be too short for this window size).")
+        sys.exit(1)
+
+    print(f"Windows: {len(series['start']):,} (WINDOW={window_size}, STEP={slide_step}, "
+          f"locality window {locality_window})")
+    print(f"  {'metric':<14s} {'min':>8s} {'mean':>8s} {'max':>8s}")
+    for key in ("spatial", "sequential", "temporal", "unique_pages"):
+        v = series[key]
+        print(f"  {key:<14s} {v.min():>8.2f} {v.mean():>8.2f} {v.max():>8.2f}")
+
+    output_file = "locality_timeseries.tsv"
+    write_tsv(series, output_file)
+    print(f"Time series saved as '{output_file}'.")
+    if plot:
+        plot_timeseries(series, trace_file, window_size, slide_step)
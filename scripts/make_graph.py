@@ -1,25 +1,9 @@
 import sys
-from igraph import Graph
-
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: python make_graph.py <trace_file>")
-        sys.exit(1)
-
-    trace_path = sys.argv[1]
-
-    # read trace file
-    try:
-        with open(trace_path) as f:
-            trace = [line.strip() for line in f if line.strip()]
-    except FileNotFoundError:
-        print(f"Error: file '{trace_path}' not found.")
-        sys.exit(1)
-
-    if not trace:
-        print("Trace file is empty.")
-        sys.exit(1)
+import numpy as np
+from interning import load_interning, format_address
 
+def build_graph(trace):
+    """Build a directed transition graph from a list of address strings."""
     # build address mapping and edges
     vertices = {}   # dictionary mapping address string → integer index (vertex id)
     edges = []         # list of pairs
@@ -32,14 +16,81 @@ def main():
             edges.append((vertices[last_addr], vertices[addr]))
         last_addr = addr
 
-    # build graph
+    # build graph (igraph is loaded only when a graph is actually built)
+    from igraph import Graph
     g = Graph(directed=True)
     g.add_vertices(len(vertices))
     g.add_edges(edges)
     g.vs["name"] = [addr for addr, _ in sorted(vertices.items(), key=lambda x: x[1])]
 
+    return g, vertices
+
+
+def build_graph_from_ids(table, ids):
+    """Build the same transition graph from interned ids (vertex id = address id)."""
+    from igraph import Graph
+    ids = np.asarray(ids, dtype=np.int64)
+    g = Graph(directed=True)
+    g.add_vertices(len(table))
+    g.add_edges(np.column_stack((ids[:-1], ids[1:])).tolist())
+    g.vs["name"] = [format_address(addr) for addr in table.tolist()]
+    return g
+
+
+def build_weighted_graph_from_ids(table, ids, workers=None):
+    """
+    Weighted transition graph: one edge per distinct transition with its count
+    as the "weight" attribute, counted in parallel by parallel_graph.py.
+    """
+    from igraph import Graph
+    from parallel_graph import sharded_transition_csr
+    from transition_graph import edge_sources
+    indptr, indices, weights = sharded_transition_csr(ids, len(table), workers)
+    g = Graph(directed=True)
+    g.add_vertices(len(table))
+    g.add_edges(np.column_stack((edge_sources(indptr), indices)).tolist())
+    g.es["weight"] = weights.tolist()
+    g.vs["name"] = [format_address(addr) for addr in table.tolist()]
+    return g
+
+
+def pop_workers(argv):
+    """Remove "--workers N" from argv (in place); None when not given."""
+    if "--workers" not in argv:
+        return None
+    i = argv.index("--workers")
+    workers = int(argv[i + 1])
+    del argv[i:i + 2]
+    return workers
+
+
+def main():
+    workers = pop_workers(sys.argv)
+    if len(sys.argv) < 2:
+        print("Usage: python make_graph.py <trace_file> [--workers N]")
+        print("  --workers N: weighted graph (one edge per distinct transition), counted by N processes")
+        sys.exit(1)
+
+    trace_path = sys.argv[1]
+
+    # read (or reuse the cached) interned trace
+    try:
+        table, ids = load_interning(trace_path)
+    except FileNotFoundError:
+        print(f"Error: file '{trace_path}' not found.")
+        sys.exit(1)
+
+    if len(ids) == 0:
+        print("Trace file is empty.")
+        sys.exit(1)
+
+    if workers:
+        g = build_weighted_graph_from_ids(table, ids, workers)
+    else:
+        g = build_graph_from_ids(table, ids)
+
     print(f"Vertices: {g.vcount()}, Edges: {g.ecount()}")
-    print(f"Unique addresses: {len(vertices)}")
+    print(f"Unique addresses: {len(table)}")
 
     # save graph to a file
     output_file = "trace_graph.graphml"
@@ -0,0 +1,126 @@
+import sys
+import numpy as np
+from interning import load_interning, previous_occurrence
+
+# Granularity -> address shift
+GRANULARITIES = {
+    "byte": 0,          # raw addresses
+    "line": 6,          # 64B cache lines
+    "page": 12,         # 4KB pages
+    "hugepage": 21,     # 2MB huge pages
+}
+ALIGNMENT_SIZES = [128, 64, 32, 16, 8, 4, 2]
+
+
+# -----------------------------------------------------------------------------
+# Derived streams
+# -----------------------------------------------------------------------------
+def coarsen(table, ids, shift):
+    """
+    Derive the interning of a coarser stream from the byte-level one.
+    Only the (small) table is re-uniqued; the trace-length id array is remapped.
+    """
+    if shift == 0:
+        return table, ids
+    coarse_table, remap = np.unique(table >> np.uint64(shift), return_inverse=True)
+    return coarse_table, remap[ids]
+
+
+# -----------------------------------------------------------------------------
+# Metrics (same definitions as la.py at byte granularity)
+# -----------------------------------------------------------------------------
+def locality_counts(units, ids, window_size, spatial_distance, sequential_max, prev=None):
+    """
+    Counts over references 1..N-1:
+      spatial    - |curr - prev| <= spatial_distance
+      sequential - 0 < curr - prev <= sequential_max
+      temporal   - same unit seen within the last window_size references
+      same       - curr == prev
+    A precomputed previous_occurrence(ids) can be passed as prev.
+    """
+    diff = np.diff(units.astype(np.int64))
+    prev = previous_occurrence(ids) if prev is None else prev
+    distance = np.arange(len(ids)) - prev
+    temporal = (prev >= 0) & (distance <= window_size)
+    return {
+        "spatial": int(np.count_nonzero(np.abs(diff) <= spatial_distance)),
+        "sequential": int(np.count_nonzero((diff > 0) & (diff <= sequential_max))),
+        "temporal": int(np.count_nonzero(temporal[1:])),
+        "same": int(np.count_nonzero(diff == 0)),
+    }
+
+
+def alignment_counts(addresses, alignment_sizes=ALIGNMENT_SIZES):
+    """Each address is counted for the largest alignment it satisfies (la.py order)."""
+    remaining = np.ones(len(addresses), dtype=bool)
+    counts = {}
+    for align in alignment_sizes:
+        hit = remaining & (addresses % np.uint64(align) == 0)
+        counts[align] = int(np.count_nonzero(hit))
+        remaining &= ~hit
+    return counts
+
+
+def analyze_locality_vectorized(addresses, window_size, alignment_sizes=ALIGNMENT_SIZES, ids=None, prev=None):
+    """
+    Vectorized la.analyze_locality: same percentages, no output.
+    ids / prev (interning and previous_occurrence) can be passed when several
+    window sizes are evaluated on the same trace.
+    """
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    if ids is None:
+        ids = np.unique(addresses, return_inverse=True)[1]
+    counts = locality_counts(addresses, ids, window_size, window_size, 8, prev)
+    total = len(addresses)
+    return {
+        "spatial": counts["spatial"] / total * 100,
+        "sequential": counts["sequential"] / total * 100,
+        "temporal": counts["temporal"] / total * 100,
+        "alignment": alignment_counts(addresses, alignment_sizes),
+    }
+
+
+def multi_granularity_locality(table, ids, window_size, granularities=GRANULARITIES):
+    """
+    Temporal, spatial and working-set metrics for every granularity in one pass
+    over the shared interning. At byte granularity spatial/sequential use la.py's
+    definitions (window_size bytes, +8B); coarser streams count neighbouring
+    units (|delta| <= 1) as spatial and the next unit (+1) as sequential.
+    """
+    results = {}
+    total = len(ids)
+    for name, shift in granularities.items():
+        g_table, g_ids = coarsen(table, ids, shift)
+        units = g_table[g_ids]
+        if shift == 0:
+            counts = locality_counts(units, g_ids, window_size, window_size, 8)
+        else:
+            counts = locality_counts(units, g_ids, window_size, 1, 1)
+        results[name] = {
+            "shift": shift,
+            "unique": len(g_table),
+            "working_set_bytes": len(g_table) << shift,
+            **{k: v / total * 100 for k, v in counts.items()},
+        }
+    return results
+
+
+def print_results(results):
+    print(f"{'granularity':<10s} {'unique':>10s} {'footprint':>12s} "
+          f"{'spatial':>8s} {'seq':>8s} {'temporal':>9s} {'same':>8s}")
+    for name, r in results.items():
+        print(f"{name:<10s} {r['unique']:>10,d} {r['working_set_bytes'] / 2**20:>10.2f}MB "
+              f"{r['spatial']:>7.2f}% {r['sequential']:>7.2f}% {r['temporal']:>8.2f}% {r['same']:>7.2f}%")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python multi_granularity.py <trace_file> <window_size>")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    window_size = int(sys.argv[2])
+
+    table, ids = load_interning(trace_file)
+    print(f"References: {len(ids):,}, window_size = {window_size}")
+    print_results(multi_granularity_locality(table, np.asarray(ids), window_size))
@@ -0,0 +1,202 @@
+import os
+import sys
+import numpy as np
+from interning import load_interning
+from multi_granularity import GRANULARITIES, coarsen
+
+# -----------------------------------------------------------------------------
+# Page occupancy pyramid, stored in the directory <trace>.pyramid/:
+#   rows.npy     sorted unique pages (row r of every level is page rows[r])
+#   level<l>.npy uint8 [columns, ceil(pages / 8)]: column c is the packbits'ed
+#                set of pages referenced in references [c * W, (c + 1) * W),
+#                W = base << l; level l + 1 ORs adjacent column pairs of level l
+#   meta.npy     base (window size of level 0), refs (trace length), levels
+# Levels are plain .npy files opened with mmap_mode="r", so a page reference
+# map for any power-of-two window and time range is a slice of one level that
+# only reads the columns it shows, without going back to the trace. Windows
+# do not overlap (STEP = WINDOW); the last column of a level may cover a
+# shorter tail.
+# -----------------------------------------------------------------------------
+PYRAMID_SUFFIX = ".pyramid"
+PAGE_SHIFT = GRANULARITIES["page"]
+MIN_BASE = 64               # smallest window of level 0 (references)
+MAX_LEVEL0_BITS = 1 << 33   # caps level 0 at 1 GiB packed; base grows for longer traces
+DENSE_BLOCK_BITS = 1 << 28  # unpacked (bool) cells per step while building level 0
+RENDER_WIDTH = 1000         # columns drawn when no level is requested
+
+
+def choose_base(num_refs, num_pages, max_bits=MAX_LEVEL0_BITS):
+    base = MIN_BASE
+    while (num_refs // base + 1) * num_pages > max_bits:
+        base <<= 1
+    return base
+
+
+def occupancy_level0(page_ids, num_pages, base, out=None):
+    """Packed level 0: one bit per (window of base references, page), written into out if given."""
+    num_columns = -(-len(page_ids) // base)
+    packed = np.zeros((num_columns, -(-num_pages // 8)), dtype=np.uint8) if out is None else out
+    step = max(1, DENSE_BLOCK_BITS // max(num_pages, 1))
+    for first in range(0, num_columns, step):
+        last = min(first + step, num_columns)
+        block = np.asarray(page_ids[first * base:last * base], dtype=np.int64)
+        dense = np.zeros((last - first, num_pages), dtype=bool)
+        dense[np.arange(len(block)) // base, block] = True
+        packed[first:last] = np.packbits(dense, axis=1)
+    return packed
+
+
+def next_level(packed):
+    """OR-reduce adjacent column pairs (an odd last column is carried over)."""
+    pairs = packed[:len(packed) // 2 * 2].reshape(-1, 2, packed.shape[1])
+    merged = pairs[:, 0] | pairs[:, 1]
+    if len(packed) % 2:
+        merged = np.concatenate((merged, packed[-1:]))
+    return merged
+
+
+def pyramid_paths(trace_file):
+    directory = trace_file + PYRAMID_SUFFIX
+    return directory, os.path.join(directory, "rows.npy"), os.path.join(directory, "meta.npy")
+
+
+def level_path(directory, l):
+    return os.path.join(directory, f"level{l}.npy")
+
+
+def build_pyramid(trace_file, base=None):
+    table, ids = load_interning(trace_file)
+    rows, page_ids = coarsen(table, np.asarray(ids), PAGE_SHIFT)
+    base = base or choose_base(len(page_ids), len(rows))
+
+    directory, rows_path, meta_path = pyramid_paths(trace_file)
+    os.makedirs(directory, exist_ok=True)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)            # the pyramid is incomplete until meta.npy is rewritten
+    for name in os.listdir(directory):
+        if name.startswith("level"):
+            os.remove(os.path.join(directory, name))
+    np.save(rows_path, rows)
+
+    # level 0 is written straight into its file; coarser levels are at most half its size
+    shape = (-(-len(page_ids) // base), -(-len(rows) // 8))
+    level = np.lib.format.open_memmap(level_path(directory, 0), mode="w+", dtype=np.uint8, shape=shape)
+    occupancy_level0(page_ids, len(rows), base, out=level)
+    level.flush()
+    num_levels = 1
+    while len(level) > 1:
+        level = next_level(level)
+        np.save(level_path(directory, num_levels), level)
+        num_levels += 1
+    del level
+
+    np.save(meta_path, np.array([base, len(page_ids), num_levels], dtype=np.int64))
+    return load_pyramid(trace_file)
+
+
+class Pyramid:
+    """Read access to a stored pyramid; levels are memory-mapped on first use."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.rows = np.load(os.path.join(directory, "rows.npy"))
+        self.base, self.refs, self.num_levels = np.load(os.path.join(directory, "meta.npy")).tolist()
+        self.levels = {}
+
+    def level(self, l):
+        if l not in self.levels:
+            self.levels[l] = np.load(level_path(self.directory, l), mmap_mode="r")
+        return self.levels[l]
+
+    def window_size(self, l):
+        return self.base << l
+
+    def nbytes(self):
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory))
+
+    def level_for(self, start, stop, width=RENDER_WIDTH):
+        """Finest level that shows references start..stop-1 in at most width columns."""
+        for l in range(self.num_levels):
+            if -(-(stop - start) // self.window_size(l)) <= width:
+                return l
+        return self.num_levels - 1
+
+    def view(self, level, start=0, stop=None, lo_page=None, hi_page=None):
+        """
+        (pages, matrix) of one level: rows = pages in [lo_page, hi_page),
+        columns = windows overlapping references start..stop-1.
+        """
+        stop = self.refs if stop is None else min(stop, self.refs)
+        w = self.window_size(level)
+        first, last = start // w, -(-stop // w)
+        matrix = np.unpackbits(self.level(level)[first:last], axis=1, count=len(self.rows)).T
+        r0 = 0 if lo_page is None else int(np.searchsorted(self.rows, lo_page))
+        r1 = len(self.rows) if hi_page is None else int(np.searchsorted(self.rows, hi_page))
+        return self.rows[r0:r1], matrix[r0:r1]
+
+
+def load_pyramid(trace_file):
+    """Open <trace>.pyramid/, building it first when missing, incomplete or older than the trace."""
+    directory, _, meta_path = pyramid_paths(trace_file)
+    if not os.path.exists(meta_path) or os.path.getmtime(meta_path) < os.path.getmtime(trace_file):
+        return build_pyramid(trace_file)
+    return Pyramid(directory)
+
+
+def plot_view(pages, matrix, trace_file, window_size, start):
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+
+    plt.figure(figsize=(10, 8))
+    plt.imshow(matrix, aspect="auto", cmap=ListedColormap(["white", "#1f77b4"]), vmin=0, vmax=1,
+               interpolation="nearest", origin="lower",
+               extent=(start // window_size - 0.5, start // window_size + matrix.shape[1] - 0.5,
+                       -0.5, len(pages) - 0.5))
+    plt.title(f"Page Reference Map for {trace_file}\n(WINDOW={window_size}, STEP={window_size})",
+              fontsize=12, fontweight="bold")
+    plt.xlabel("Window Index")
+    plt.ylabel("Page Address (compact rows)")
+    ticks = np.unique(np.linspace(0, len(pages) - 1, min(12, len(pages))).round().astype(int))
+    plt.yticks(ticks, [f"0x{int(pages[i]):x}" for i in ticks])
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    usage = ("Usage:\n"
+             "  python page_pyramid.py build <trace_file> [base]\n"
+             "  python page_pyramid.py info <trace_file>\n"
+             "  python page_pyramid.py show <trace_file> [start] [stop] [level] [lo_page_hex hi_page_hex]")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+
+    command, trace_file = sys.argv[1], sys.argv[2]
+    if command == "build" and len(sys.argv) in [3, 4]:
+        pyramid = build_pyramid(trace_file, int(sys.argv[3]) if len(sys.argv) == 4 else None)
+        print(f"Built {pyramid.num_levels} levels (windows {pyramid.base}..{pyramid.window_size(pyramid.num_levels - 1)}) "
+              f"over {len(pyramid.rows):,} pages -> {pyramid.directory} ({pyramid.nbytes():,} bytes)")
+
+    elif command == "info":
+        pyramid = load_pyramid(trace_file)
+        print(f"References: {pyramid.refs:,}, pages: {len(pyramid.rows):,}")
+        for l in range(pyramid.num_levels):
+            packed = pyramid.level(l)
+            density = np.unpackbits(packed, axis=1, count=len(pyramid.rows)).mean() if packed.size else 0.0
+            print(f"  level {l:2d}: window {pyramid.window_size(l):>12,d}  columns {len(packed):>10,d}  "
+                  f"density {density * 100:6.2f}%")
+
+    elif command == "show" and len(sys.argv) in [3, 4, 5, 6, 8]:
+        pyramid = load_pyramid(trace_file)
+        start = int(sys.argv[3]) if len(sys.argv) >= 4 else 0
+        stop = int(sys.argv[4]) if len(sys.argv) >= 5 else pyramid.refs
+        level = int(sys.argv[5]) if len(sys.argv) >= 6 else pyramid.level_for(start, stop)
+        lo_page, hi_page = (int(sys.argv[6], 16), int(sys.argv[7], 16)) if len(sys.argv) == 8 else (None, None)
+        pages, matrix = pyramid.view(level, start, stop, lo_page, hi_page)
+        print(f"Level {level}: WINDOW={pyramid.window_size(level)}, {matrix.shape[1]} windows x {len(pages)} pages")
+        if len(pages) and matrix.shape[1]:
+            plot_view(pages, matrix, trace_file, pyramid.window_size(level), start)
+
+    else:
+        print(usage)
+        sys.exit(1)
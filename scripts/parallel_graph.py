@@ -0,0 +1,91 @@
+import os
+import sys
+import time
+from multiprocessing import Pool
+import numpy as np
+from interning import load_interning, format_address
+from transition_graph import csr_from_keys, edge_sources
+
+# -----------------------------------------------------------------------------
+# Sharded transition-edge aggregation
+#   map    - the interned trace is split into chunks of chunk_refs references;
+#            a worker counts the distinct src * V + dst keys of the transitions
+#            whose source lies in its chunk, reading one id past the chunk end
+#            so the boundary transition to the next chunk is counted exactly once
+#   reduce - partial (keys, counts) are merged into the weighted CSR graph of
+#            transition_graph.build_transition_csr
+# Workers map the persisted .ids.npy file themselves (or inherit the array),
+# so the trace is not copied per worker.
+# -----------------------------------------------------------------------------
+CHUNK_REFS = 1 << 24
+
+
+_ids = None
+
+
+def _attach(source):
+    global _ids
+    if isinstance(source, tuple):       # (path, dtype, shape, offset) of a memmapped .ids.npy
+        path, dtype, shape, offset = source
+        _ids = np.memmap(path, dtype=dtype, mode="r", shape=shape, offset=offset)
+    else:
+        _ids = source
+
+
+def count_chunk(args):
+    """Distinct transition keys (sorted) and their counts for sources start..stop-1."""
+    start, stop, num_vertices = args
+    ids = np.asarray(_ids[start:stop + 1], dtype=np.int64)
+    keys = ids[:-1] * num_vertices + ids[1:]
+    return np.unique(keys, return_counts=True)
+
+
+def merge_counts(parts):
+    """Sum the counts of equal keys over all partial results."""
+    keys = np.concatenate([k for k, _ in parts])
+    counts = np.concatenate([c for _, c in parts])
+    keys, inverse = np.unique(keys, return_inverse=True)
+    return keys, np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+
+
+def sharded_transition_csr(ids, num_vertices, workers=None, chunk_refs=CHUNK_REFS):
+    """(indptr, indices, weights) of the transition graph, counted in parallel chunks."""
+    n = len(ids)
+    tasks = [(start, min(start + chunk_refs, n - 1), num_vertices) for start in range(0, max(n - 1, 0), chunk_refs)]
+    if not tasks:
+        return csr_from_keys(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), num_vertices)
+
+    if isinstance(ids, np.memmap) and ids.filename:
+        source = (ids.filename, ids.dtype.str, ids.shape, ids.offset)
+    else:
+        source = ids
+    if workers == 1 or len(tasks) == 1:
+        _attach(source)
+        parts = [count_chunk(task) for task in tasks]
+    else:
+        with Pool(workers, initializer=_attach, initargs=(source,)) as pool:
+            parts = pool.map(count_chunk, tasks)
+    keys, weights = merge_counts(parts)
+    return csr_from_keys(keys, weights, num_vertices)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3, 4]:
+        print("Usage: python parallel_graph.py <itrace_file> [workers] [chunk_refs]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    workers = int(sys.argv[2]) if len(sys.argv) >= 3 else os.cpu_count()
+    chunk_refs = int(sys.argv[3]) if len(sys.argv) == 4 else CHUNK_REFS
+
+    table, ids = load_interning(trace_file)
+    started = time.perf_counter()
+    indptr, indices, weights = sharded_transition_csr(ids, len(table), workers, chunk_refs)
+    elapsed = time.perf_counter() - started
+
+    print(f"Vertices: {len(table):,}, distinct edges: {len(indices):,}, transitions: {int(weights.sum()):,}")
+    print(f"Built in {elapsed:.2f}s with {workers} workers ({-(-len(ids) // chunk_refs)} chunks)")
+    print("Heaviest edges:")
+    src = edge_sources(indptr)
+    for e in np.argsort(weights, kind="stable")[::-1][:15].tolist():
+        print(f"  {format_address(table[src[e]])} -> {format_address(table[indices[e]])}\t{int(weights[e])}")
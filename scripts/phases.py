@@ -0,0 +1,164 @@
+import sys
+import numpy as np
+from interning import load_interning
+from multi_granularity import GRANULARITIES, analyze_locality_vectorized, coarsen
+
+INTERVAL_SIZE = 10000       # references per interval
+PROJECTION_DIM = 32         # random projection of the frequency vectors
+MAX_PHASES = 8              # upper bound on k tried by choose_k
+
+
+# -----------------------------------------------------------------------------
+# Interval signatures (basic-block-vector style)
+# -----------------------------------------------------------------------------
+def interval_vectors(ids, num_ids, interval_size=INTERVAL_SIZE, dim=PROJECTION_DIM, seed=0):
+    """
+    Frequency vector of ids (pages or instruction addresses) for every full
+    interval, randomly projected to `dim` dimensions and L1-normalised.
+    Projection is applied per reference, so no (intervals x ids) matrix is built.
+    """
+    num_intervals = len(ids) // interval_size
+    ids = np.asarray(ids[:num_intervals * interval_size], dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    projection = rng.random((num_ids, dim)) * 2.0 - 1.0
+
+    interval = np.arange(len(ids)) // interval_size
+    vectors = np.zeros((num_intervals, dim))
+    for d in range(dim):
+        vectors[:, d] = np.bincount(interval, weights=projection[ids, d], minlength=num_intervals)
+    return vectors / interval_size
+
+
+# -----------------------------------------------------------------------------
+# k-means (k-means++ seeding, Lloyd iterations)
+# -----------------------------------------------------------------------------
+def kmeans(points, k, iterations=50, seed=0):
+    rng = np.random.default_rng(seed)
+    n = len(points)
+    k = min(k, n)
+
+    centers = [points[rng.integers(n)]]
+    for _ in range(1, k):
+        dist = np.min(((points[:, None, :] - np.array(centers)[None]) ** 2).sum(-1), axis=1)
+        total = dist.sum()
+        probs = dist / total if total > 0 else np.full(n, 1.0 / n)
+        centers.append(points[rng.choice(n, p=probs)])
+    centers = np.array(centers)
+
+    labels = np.zeros(n, dtype=np.int64)
+    for it in range(iterations):
+        dist = ((points[:, None, :] - centers[None]) ** 2).sum(-1)
+        new_labels = dist.argmin(axis=1)
+        if it > 0 and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(k):
+            members = points[labels == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+    inertia = float(((points - centers[labels]) ** 2).sum())
+    return labels, centers, inertia
+
+
+def choose_k(points, max_k=MAX_PHASES, seed=0):
+    """
+    Smallest k whose clustering explains most of the variance
+    (SimPoint-like: within 10% of the best inertia reduction over k = 1..max_k).
+    """
+    runs = [kmeans(points, k, seed=seed) for k in range(1, min(max_k, len(points)) + 1)]
+    inertias = np.array([r[2] for r in runs])
+    base, best = inertias[0], inertias.min()
+    if base <= 0:
+        return runs[0]
+    for run, inertia in zip(runs, inertias):
+        if (base - inertia) >= 0.9 * (base - best):
+            return run
+    return runs[-1]
+
+
+# -----------------------------------------------------------------------------
+# Representative intervals
+# -----------------------------------------------------------------------------
+def detect_phases(ids, num_ids, interval_size=INTERVAL_SIZE, k=None, seed=0):
+    """
+    Cluster the intervals and pick, per phase, the interval closest to its
+    centroid. Returns the per-interval phase labels and a list of
+    (interval index, weight) where weight = share of intervals in the phase.
+    """
+    vectors = interval_vectors(ids, num_ids, interval_size, seed=seed)
+    if len(vectors) == 0:
+        return np.zeros(0, dtype=np.int64), []
+    if k is None:
+        labels, centers, _ = choose_k(vectors, seed=seed)
+    else:
+        labels, centers, _ = kmeans(vectors, k, seed=seed)
+
+    representatives = []
+    for c in range(len(centers)):
+        members = np.flatnonzero(labels == c)
+        if len(members) == 0:
+            continue
+        dist = ((vectors[members] - centers[c]) ** 2).sum(-1)
+        representatives.append((int(members[dist.argmin()]), len(members) / len(vectors)))
+    representatives.sort()
+    return labels, representatives
+
+
+def sample_intervals(array, representatives, interval_size=INTERVAL_SIZE):
+    """Yield (slice of array for each representative interval, weight)."""
+    for index, weight in representatives:
+        yield array[index * interval_size:(index + 1) * interval_size], weight
+
+
+def extrapolate(metric, array, representatives, interval_size=INTERVAL_SIZE):
+    """
+    Weighted combination of a per-interval metric over the representatives.
+    metric(chunk) must return a number or a dict of numbers.
+    """
+    combined = None
+    for chunk, weight in sample_intervals(array, representatives, interval_size):
+        value = metric(chunk)
+        if isinstance(value, dict):
+            combined = combined or {key: 0.0 for key in value}
+            for key in combined:
+                combined[key] += weight * value[key]
+        else:
+            combined = (combined or 0.0) + weight * value
+    return combined
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3, 4, 5]:
+        print("Usage: python phases.py <trace_file> [interval_size] [page|line|byte] [k]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    interval_size = int(sys.argv[2]) if len(sys.argv) >= 3 else INTERVAL_SIZE
+    unit = sys.argv[3] if len(sys.argv) >= 4 else "page"
+    k = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    table, ids = load_interning(trace_file)
+    ids = np.asarray(ids)
+    unit_table, unit_ids = coarsen(table, ids, GRANULARITIES[unit])
+
+    labels, reps = detect_phases(unit_ids, len(unit_table), interval_size, k)
+    if not reps:
+        print("Trace is shorter than one interval.")
+        sys.exit(1)
+
+    sampled = len(reps) * interval_size
+    print(f"Intervals: {len(labels):,} x {interval_size:,} refs, phases: {len(reps)}")
+    print("Representative intervals (index: weight):")
+    for index, weight in reps:
+        print(f"  {index}: {weight:.3f}")
+    print(f"Sampled references: {sampled:,} ({sampled / len(ids) * 100:.2f}% of the trace)")
+
+    # Locality of the sample vs. the full trace (window_size = 100)
+    addresses = table[ids]
+    estimate = extrapolate(lambda chunk: {
+        k: v for k, v in analyze_locality_vectorized(chunk, 100).items() if k != "alignment"
+    }, addresses, reps, interval_size)
+    full = analyze_locality_vectorized(addresses, 100)
+    print("\nLocality (window_size = 100): estimate vs full trace")
+    for key in ("spatial", "sequential", "temporal"):
+        print(f"  {key:<10s} {estimate[key]:6.2f}%  {full[key]:6.2f}%")
@@ -1,49 +1,44 @@
-import subprocess
 import matplotlib.pyplot as plt
 import sys
-import re
+from stride_profile import GRANULARITY_SHIFTS, stride_profile
+from trace_io import read_addresses
 
-if len(sys.argv) != 3:
-    print("Usage: python plot_sequential_locality.py <analysis_script> <trace_file>")
+# Legacy form "<analysis_script> <trace_file>" is still accepted, the script is ignored
+args = [a for a in sys.argv[1:] if not a.endswith(".py")]
+if len(args) not in [1, 2] or (len(args) == 2 and args[1] not in GRANULARITY_SHIFTS):
+    print("Usage: python plot_sequential_locality.py <trace_file> [byte|line|page]")
     sys.exit(1)
 
-analysis_script = sys.argv[1]
-trace_file = sys.argv[2]
+trace_file = args[0]
+granularity = args[1] if len(args) == 2 else "byte"
 
-# Run the analysis script and capture output
-result = subprocess.run(["python3", analysis_script, trace_file],
-                        capture_output=True, text=True)
+# Compute the stride profile in-process
+profile = stride_profile(read_addresses(trace_file), granularity)
+total = max(profile["strides"], 1)
 
-output_lines = result.stdout.splitlines()
-
-# Parse stride histogram
-stride_distribution = {}
-
-in_histogram = False
-for line in output_lines:
-    if "Sequential Stride Histogram" in line:
-        in_histogram = True
-        continue
-    if in_histogram and line.strip() == "":
-        break 
-    if in_histogram:
-        match = re.match(r"\s*\+?([>\d]+)B: \d+ \(([\d\.]+)%\)", line)
-        if match:
-            stride = match.group(1)
-            percentage = float(match.group(2))
-            stride_distribution[stride] = percentage
-
-# Prepare for plotting
-stride_labels = sorted(stride_distribution.keys(), key=lambda x: int(x.strip(">")) if x != '>8' else 9)
-percentages = [stride_distribution[k] for k in stride_labels]
+# Forward strides +1..+8 as before
+stride_labels = sorted(profile["forward"])
+percentages = [profile["forward"][s] / total * 100 for s in stride_labels]
+unit = "B" if granularity == "byte" else f" {granularity}"
 
 # Plot
 plt.figure(figsize=(8, 5))
-plt.bar([f"{s}B" for s in stride_labels], percentages, color='lightcoral')
+plt.bar([f"{s}{unit}" for s in stride_labels], percentages, color='lightcoral')
 plt.xlabel("Forward Stride")
 plt.ylabel("Percentage of Accesses (%)")
 # plt.title("Sequential Stride Distribution")
-plt.ylim(0, max(percentages) * 1.1)
+plt.ylim(0, max(max(percentages) * 1.1, 1))
+plt.grid(axis='y')
+plt.tight_layout()
+plt.show()
+
+# Top signed strides (full distribution)
+top = profile["top"]
+plt.figure(figsize=(10, 5))
+plt.bar([f"{s:+d}{unit}" for s, _ in top], [c / total * 100 for _, c in top], color='steelblue')
+plt.xlabel(f"Signed stride (top {len(top)})")
+plt.ylabel("Percentage of Accesses (%)")
+plt.xticks(rotation=45)
 plt.grid(axis='y')
 plt.tight_layout()
 plt.show()
@@ -0,0 +1,202 @@
+import sys
+import numpy as np
+from interning import previous_occurrence
+from trace_io import read_pinatrace
+
+# -----------------------------------------------------------------------------
+# Trace-driven prefetcher model (cache-line granularity, no feedback):
+#   - the cache holds the lines referenced in the last CACHE_WINDOW references,
+#     a demand reference outside it is a (baseline) miss
+#   - prefetchers train and trigger on the baseline stream; a prefetch of line X
+#     issued at t is dropped when X is still cached, and useful when X is next
+#     demanded within CACHE_WINDOW references (it would have been a miss)
+#   coverage   = covered misses / baseline misses
+#   accuracy   = useful prefetches / issued prefetches (duplicates counted once)
+#   timeliness = covered misses whose first prefetch was issued >= LATENCY
+#                references before the demand / covered misses
+# Every prefetcher predicts lines L + direction * o for offsets o = 1..max;
+# a configuration (degree d, distance k) issues offsets k..k+d-1, so each
+# (trigger, offset) pair is looked up once and shared by all configurations.
+# -----------------------------------------------------------------------------
+LINE_SHIFT = 6              # 64B cache lines
+CACHE_WINDOW = 4096         # references a line stays cached (and a prefetch stays useful)
+LATENCY = 20                # references a prefetch needs to arrive in time
+STREAM_WINDOW = 16          # references in which a neighbouring line confirms a stream
+DEGREES = (1, 2, 4, 8)
+DISTANCES = (1, 2, 4, 8, 16)
+
+
+# -----------------------------------------------------------------------------
+# Occurrence lookups for arbitrary (line, time) queries
+# -----------------------------------------------------------------------------
+class OccurrenceIndex:
+    """All demand references sorted by (line, time), searched with one searchsorted per query batch."""
+
+    def __init__(self, lines):
+        self.n = len(lines)
+        self.table, ids = np.unique(lines, return_inverse=True)
+        self.keys = np.sort(ids.astype(np.int64) * (self.n + 1) + np.arange(self.n))
+
+    def _locate(self, lines, times, side):
+        idx = np.minimum(np.searchsorted(self.table, lines), len(self.table) - 1)
+        known = self.table[idx] == lines
+        pos = np.searchsorted(self.keys, idx * (self.n + 1) + times, side=side)
+        return idx, known, pos
+
+    def next_after(self, lines, times):
+        """Time of the first demand of each line after times (-1 if none)."""
+        if self.n == 0:                 # empty trace: nothing is ever demanded
+            return np.full(len(lines), -1, dtype=np.int64)
+        idx, known, pos = self._locate(lines, times, "right")
+        pos = np.minimum(pos, len(self.keys) - 1)
+        hit = known & (self.keys[pos] // (self.n + 1) == idx) & (self.keys[pos] % (self.n + 1) > times)
+        return np.where(hit, self.keys[pos] % (self.n + 1), -1)
+
+    def last_until(self, lines, times):
+        """Time of the last demand of each line at or before times (-1 if none)."""
+        if self.n == 0:                 # empty trace: nothing is ever demanded
+            return np.full(len(lines), -1, dtype=np.int64)
+        idx, known, pos = self._locate(lines, times, "right")
+        pos = np.maximum(pos - 1, 0)
+        hit = known & (self.keys[pos] // (self.n + 1) == idx) & (self.keys[pos] % (self.n + 1) <= times)
+        return np.where(hit, self.keys[pos] % (self.n + 1), -1)
+
+
+# -----------------------------------------------------------------------------
+# Triggers: (time, line, direction) of every prefetch request
+# -----------------------------------------------------------------------------
+def baseline_misses(lines, cache_window=CACHE_WINDOW):
+    prev = previous_occurrence(np.unique(lines, return_inverse=True)[1])
+    return (prev < 0) | (np.arange(len(lines)) - prev > cache_window)
+
+
+def next_line_triggers(lines, miss, index):
+    t = np.flatnonzero(miss)
+    return t, lines[t], np.ones(len(t), dtype=np.int64)
+
+
+def stride_triggers(lines, miss, index, ips=None):
+    """
+    Reference prediction table: a stream (one per ip, or the whole trace
+    without ips) triggers once the same non-zero stride is seen twice in a row.
+    """
+    if ips is None:
+        prev = np.arange(len(lines)) - 1
+    else:
+        prev = previous_occurrence(np.unique(ips, return_inverse=True)[1])
+    p = np.maximum(prev, 0)
+    has_stride = prev >= 0
+    stride = np.where(has_stride, lines - lines[p], 0)
+    confirmed = has_stride & (prev[p] >= 0) & (stride != 0) & (stride == stride[p])
+    t = np.flatnonzero(confirmed)
+    return t, lines[t], stride[t]
+
+
+def stream_triggers(lines, miss, index, window=STREAM_WINDOW):
+    """A miss to line L starts/extends an ascending (descending) stream if L-1 (L+1) was just referenced."""
+    t = np.flatnonzero(miss)
+    lines_t = lines[t]
+    recent = {}
+    for direction in (1, -1):
+        last = index.last_until(lines_t - direction, t)
+        recent[direction] = (last >= 0) & (t - last <= window)
+    direction = np.where(recent[1], 1, np.where(recent[-1], -1, 0))
+    keep = direction != 0
+    return t[keep], lines_t[keep], direction[keep]
+
+
+# -----------------------------------------------------------------------------
+# Batched evaluation of all configurations
+# -----------------------------------------------------------------------------
+def evaluate(triggers, index, miss, degrees=DEGREES, distances=DISTANCES,
+             cache_window=CACHE_WINDOW, latency=LATENCY):
+    """Coverage / accuracy / timeliness for every (degree, distance) from one lookup pass."""
+    t, line, direction = triggers
+    max_offset = max(degrees) + max(distances) - 1
+    offsets = np.arange(1, max_offset + 1)
+
+    # candidate (trigger, offset) grid, flattened
+    cand_t = np.repeat(t, max_offset)
+    cand_line = np.repeat(line, max_offset) + np.tile(offsets, len(t)) * np.repeat(direction, max_offset)
+    cand_offset = np.tile(offsets, len(t))
+    valid = cand_line >= 0
+    cand_t, cand_line, cand_offset = cand_t[valid], cand_line[valid], cand_offset[valid]
+
+    last = index.last_until(cand_line, cand_t)
+    cached = (last >= 0) & (cand_t - last <= cache_window)
+    cand_t, cand_line, cand_offset = cand_t[~cached], cand_line[~cached], cand_offset[~cached]
+
+    demand = index.next_after(cand_line, cand_t)
+    useful = (demand >= 0) & (demand - cand_t <= cache_window)
+    # a prefetch is identified by its line and the demand it serves (or its lifetime slot)
+    served = np.where(useful, demand, index.n + cand_t // cache_window)
+
+    total_misses = max(int(np.count_nonzero(miss)), 1)
+    results = []
+    for degree in degrees:
+        for distance in distances:
+            sel = (cand_offset >= distance) & (cand_offset < distance + degree)
+            issued = len(np.unique(np.column_stack((cand_line[sel], served[sel])), axis=0)) if np.any(sel) else 0
+
+            u = sel & useful
+            lead = demand[u] - cand_t[u]
+            order = np.argsort(lead, kind="stable")[::-1]            # longest lead first
+            covered_t, first = np.unique(demand[u][order], return_index=True)
+            timely = int(np.count_nonzero(lead[order][first] >= latency))
+            covered = len(covered_t)
+
+            results.append({
+                "degree": degree, "distance": distance, "issued": issued, "covered": covered,
+                "coverage": covered / total_misses * 100,
+                "accuracy": covered / issued * 100 if issued else 0.0,
+                "timeliness": timely / covered * 100 if covered else 0.0,
+            })
+    return results
+
+
+def simulate(addresses, ips=None, line_shift=LINE_SHIFT, cache_window=CACHE_WINDOW, latency=LATENCY,
+             degrees=DEGREES, distances=DISTANCES):
+    """{prefetcher: [per-configuration metrics]} plus the baseline miss count."""
+    lines = (np.asarray(addresses, dtype=np.uint64) >> np.uint64(line_shift)).astype(np.int64)
+    miss = baseline_misses(lines, cache_window)
+    results = {"references": len(lines), "misses": int(np.count_nonzero(miss)),
+               "cache_window": cache_window, "latency": latency}
+    if len(lines) == 0:                 # empty trace: no prefetcher rows
+        return results
+    index = OccurrenceIndex(lines)
+    triggers = {
+        "next_line": next_line_triggers(lines, miss, index),
+        "stride" if ips is None else "stride_ip": stride_triggers(lines, miss, index, ips),
+        "stream": stream_triggers(lines, miss, index),
+    }
+    for name, trig in triggers.items():
+        results[name] = evaluate(trig, index, miss, degrees, distances, cache_window, latency)
+    return results
+
+
+def print_results(results):
+    print(f"References: {results['references']:,}, baseline misses: {results['misses']:,} "
+          f"(cache window {results['cache_window']}, latency {results['latency']})")
+    for name, rows in results.items():
+        if not isinstance(rows, list):
+            continue
+        print(f"\n{name}:")
+        print(f"  {'degree':>6s} {'dist':>5s} {'issued':>10s} {'coverage':>9s} {'accuracy':>9s} {'timely':>8s}")
+        for r in rows:
+            print(f"  {r['degree']:>6d} {r['distance']:>5d} {r['issued']:>10,d} {r['coverage']:>8.2f}% "
+                  f"{r['accuracy']:>8.2f}% {r['timeliness']:>7.2f}%")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3, 4]:
+        print("Usage: python prefetch_sim.py <trace_file|pinatrace_file> [cache_window] [latency]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    if len(sys.argv) >= 3:
+        CACHE_WINDOW = int(sys.argv[2])
+    if len(sys.argv) == 4:
+        LATENCY = int(sys.argv[3])
+
+    ips, addresses = read_pinatrace(trace_file)
+    print_results(simulate(addresses, ips, cache_window=CACHE_WINDOW, latency=LATENCY))
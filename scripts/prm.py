@@ -1,9 +1,7 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.colors import ListedColormap
-from matplotlib.patches import Patch
 import sys
 import re
+from profiling import Profiler, pop_profile_flags
 
 PAGE_SIZE = 4096        # 4KB pages
 WINDOW_SIZE = 5000      # References per window (overridden in main)
@@ -162,81 +160,48 @@ def color_for_region(region_name):
 
 
 # -----------------------------------------------------------------------------
-# Page Reference Map
+# Sliding windows and presence matrix
 # -----------------------------------------------------------------------------
-def create_page_reference_map(trace_file, pages, map_file=None):
-    global WINDOW_SIZE, SLIDE_STEP
-
-    # Build sliding windows of references
+def build_windows(pages, window_size, slide_step):
+    """Return the set of unique pages for every sliding window."""
     windows = []
-    for start in range(0, len(pages) - WINDOW_SIZE + 1, SLIDE_STEP):
-        end = start + WINDOW_SIZE
+    for start in range(0, len(pages) - window_size + 1, slide_step):
+        end = start + window_size
         window_pages = set(pages[start:end])  # unique pages per window
         windows.append(window_pages)
+    return windows
 
-    print(f"  Created {len(windows)} sliding windows (step={SLIDE_STEP})")
-
-    if not windows:
-        print("No windows created (trace may be too short for this WINDOW_SIZE).")
-        return
 
-    # Create a compact row index for all referenced pages
+def build_presence_matrix(windows):
+    """Return (sorted_pages, matrix) with rows=pages, cols=windows, values in {0,1}."""
     all_pages = set().union(*windows)
     sorted_pages = sorted(all_pages)    # stable order for matrix rows
     page_to_row = {p: i for i, p in enumerate(sorted_pages)}
-    num_unique_pages = len(sorted_pages)
-    print(f"  Unique pages: {num_unique_pages}")
 
-    # Build presence matrix: rows=pages, cols=windows, values in {0,1}
-    matrix = np.zeros((num_unique_pages, len(windows)), dtype=int)
+    matrix = np.zeros((len(sorted_pages), len(windows)), dtype=int)
     for col, w in enumerate(windows):
         for page in w:
             matrix[page_to_row[page], col] = 1
+    return sorted_pages, matrix
 
-    density = np.sum(matrix) / matrix.size
-    print(f"  Matrix density: {density*100:.2f}%")
-
-    # Default legend (no memory map coloring)
-    region_colors = None
-    legend_patches = [
-        Patch(facecolor="white", edgecolor="black", label="Not Referenced"),
-        Patch(facecolor="#1f77b4", edgecolor="black", label="Referenced"),
-    ]
 
-    # If memory map provided, assign each row a region color
-    if map_file:
-        regions = parse_memory_map(map_file)
-        main_exec = find_main_executable_path(regions)
-        print("  Found main executable:", main_exec)
-
-        region_labels = []
-        for p in sorted_pages:  # match row order
-            region_labels.append(classify_page(p, regions, main_exec_path=main_exec))
+# -----------------------------------------------------------------------------
+# Page Reference Map
+# -----------------------------------------------------------------------------
+def draw_page_reference_map(trace_file, sorted_pages, matrix, region_colors=None, legend_entries=()):
+    """Build the page reference map figure; showing it is left to the caller."""
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+    from matplotlib.patches import Patch
 
-        region_colors = [color_for_region(r) for r in region_labels]
+    num_unique_pages, num_windows = matrix.shape
 
-        # Legend for memory regions
-        legend_patches = [
-            Patch(facecolor=color_for_region("stack"), label="Stack"),
-            Patch(facecolor=color_for_region("heap"), label="Heap"),
-            Patch(facecolor=color_for_region("pin"), label="Pin"),
-            Patch(facecolor=color_for_region("lib"), label="Libraries"),
-            Patch(facecolor=color_for_region("exec"), label="Executable"),
-            Patch(facecolor=color_for_region("file"), label="File (non-exec)"),
-            Patch(facecolor=color_for_region("anon"), label="Anonymous"),
-            Patch(facecolor=color_for_region("vdso"), label="VDSO"),
-            Patch(facecolor=color_for_region("vvar"), label="VVAR"),
-            Patch(facecolor=color_for_region("vsyscall"), label="VSYSCALL"),            
-        ]
-        print("  Memory coloring applied based on:", map_file)
-
-    # Plot Page Reference Map
     plt.figure(figsize=(10, 8))
 
     if region_colors:
         # RGB image where referenced cells take the row's region color
         color_matrix = np.ones(
-            (num_unique_pages, len(windows), 3), dtype=float
+            (num_unique_pages, num_windows, 3), dtype=float
         )
         for row_idx, color_hex in enumerate(region_colors):
             rgb = np.array(
@@ -287,23 +252,105 @@ def create_page_reference_map(trace_file, pages, map_file=None):
 
     plt.yticks(tick_positions, tick_labels)
 
+    legend_patches = [Patch(facecolor=face, edgecolor=edge, label=label)
+                      for face, edge, label in legend_entries]
     plt.legend(handles=legend_patches, loc="upper left", fontsize=8, frameon=True)
     plt.tight_layout()
+
+
+def create_page_reference_map(trace_file, pages, map_file=None, profiler=None, plot=True):
+    """
+    Build (and optionally plot) the page reference map.
+    Returns (sorted_pages, matrix, region_labels); region_labels is None without a map file.
+    """
+    global WINDOW_SIZE, SLIDE_STEP
+    profiler = profiler or Profiler(enabled=False)
+
+    # Build sliding windows of references
+    with profiler.stage("windows", refs=len(pages)):
+        windows = build_windows(pages, WINDOW_SIZE, SLIDE_STEP)
+    profiler.count("windows", len(windows))
+
+    print(f"  Created {len(windows)} sliding windows (step={SLIDE_STEP})")
+
+    if not windows:
+        print("No windows created (trace may be too short for this WINDOW_SIZE).")
+        return [], np.zeros((0, 0), dtype=int), None
+
+    # Create a compact row index and presence matrix for all referenced pages
+    with profiler.stage("matrix"):
+        sorted_pages, matrix = build_presence_matrix(windows)
+    num_unique_pages = len(sorted_pages)
+    profiler.count("unique_pages", num_unique_pages)
+    print(f"  Unique pages: {num_unique_pages}")
+
+    density = np.sum(matrix) / matrix.size
+    print(f"  Matrix density: {density*100:.2f}%")
+
+    # Default legend (no memory map coloring)
+    region_labels = region_colors = None
+    legend_entries = [  # (facecolor, edgecolor, label)
+        ("white", "black", "Not Referenced"),
+        ("#1f77b4", "black", "Referenced"),
+    ]
+
+    # If memory map provided, assign each row a region color
+    if map_file:
+        with profiler.stage("classify"):
+            regions = parse_memory_map(map_file)
+            main_exec = find_main_executable_path(regions)
+            print("  Found main executable:", main_exec)
+
+            region_labels = []
+            for p in sorted_pages:  # match row order
+                region_labels.append(classify_page(p, regions, main_exec_path=main_exec))
+
+        region_colors = [color_for_region(r) for r in region_labels]
+
+        # Legend for memory regions
+        legend_entries = [
+            (color_for_region("stack"), None, "Stack"),
+            (color_for_region("heap"), None, "Heap"),
+            (color_for_region("pin"), None, "Pin"),
+            (color_for_region("lib"), None, "Libraries"),
+            (color_for_region("exec"), None, "Executable"),
+            (color_for_region("file"), None, "File (non-exec)"),
+            (color_for_region("anon"), None, "Anonymous"),
+            (color_for_region("vdso"), None, "VDSO"),
+            (color_for_region("vvar"), None, "VVAR"),
+            (color_for_region("vsyscall"), None, "VSYSCALL"),
+        ]
+        print("  Memory coloring applied based on:", map_file)
+
+    if not plot:
+        return sorted_pages, matrix, region_labels
+
+    # Plot Page Reference Map (matplotlib is only loaded when a map is actually drawn)
+    import matplotlib.pyplot as plt
+    with profiler.stage("plot"):    # building the figure; show() may block while the window is open
+        draw_page_reference_map(trace_file, sorted_pages, matrix, region_colors, legend_entries)
     plt.show()
 
+    return sorted_pages, matrix, region_labels
+
 
 # -----------------------------------------------------------------------------
 # Main
 # -----------------------------------------------------------------------------
 if __name__ == "__main__":
+    profiler = Profiler(*pop_profile_flags(sys.argv))
+
     if len(sys.argv) < 2:
         print(
-            "Usage: python prm.py <trace_file> [window_size] [memory_map_file]"
+            "Usage: python prm.py <trace_file> [window_size] [memory_map_file] [--profile | --profile-memory]"
         )
         sys.exit(1)
 
     trace_file = sys.argv[1]
-    pages = read_trace(trace_file)
+    with profiler.stage("parse"):
+        pages = read_trace(trace_file)
+    profiler.set_refs(len(pages))
+    profiler.count("refs", len(pages))
 
     # Window size
     if len(sys.argv) > 2 and sys.argv[2].isdigit():
@@ -323,4 +370,9 @@ if __name__ == "__main__":
         map_file = sys.argv[3]
 
     print(f"\nUsing WINDOW_SIZE = {WINDOW_SIZE}, SLIDE_STEP = {SLIDE_STEP}")
-    create_page_reference_map(trace_file, pages, map_file)
\ No newline at end of file
+    profiler.count("window_size", WINDOW_SIZE)
+    profiler.count("slide_step", SLIDE_STEP)
+    create_page_reference_map(trace_file, pages, map_file, profiler)
+
+    # Report lands next to the trace: <trace_file>.prm_profile.json
+    profiler.write_report(f"{trace_file}.prm_profile.json")
\ No newline at end of file
@@ -0,0 +1,219 @@
+import os
+import sys
+import numpy as np
+from trace_io import is_archive, is_binary_trace, iter_address_blocks
+from prm import PAGE_SIZE, color_for_region
+
+# -----------------------------------------------------------------------------
+# Out-of-core page reference map
+#   pass 1 - stream the trace in blocks and append the unique pages of every
+#            sliding window to an on-disk column store (CSC without values):
+#              <store>/pages.u64   unique pages of window 0, window 1, ...
+#              <store>/colptr.i64  window w = pages[colptr[w]:colptr[w+1]]
+#   pass 2 - read the memory-mapped store a chunk of pages and offsets at a
+#            time, build the compact row index (<store>/rows.u64, sorted
+#            unique pages) and rasterize the map into at most MAX_CELLS cells
+#            for plotting.
+# Peak memory is set by memory_budget. In pass 1 half of it sizes the
+# streamed blocks and half the group of windows whose columns are built and
+# written at a time (a window holds up to window_size entries, however small
+# the step). It also sizes the column chunks of pass 2 and the raster. The row
+# index (one entry per distinct page) is the only structure that grows with
+# the footprint.
+# -----------------------------------------------------------------------------
+MEMORY_BUDGET = 256 << 20       # bytes
+BYTES_PER_REF = 64              # working memory per streamed reference (pages, uniques, temporaries)
+TEXT_BYTES_PER_REF = 256        # text traces also hold the line strings and Python ints while parsing
+BYTES_PER_ENTRY = 32            # column entry being written (window slice, unique, concatenated output)
+BYTES_PER_CELL = 16             # raster cell plus the colored image built from it
+
+
+def store_paths(store_dir):
+    return (os.path.join(store_dir, "pages.u64"),
+            os.path.join(store_dir, "colptr.i64"),
+            os.path.join(store_dir, "rows.u64"))
+
+
+def budget_refs(memory_budget, window_size, bytes_per_ref=BYTES_PER_REF):
+    refs = memory_budget // bytes_per_ref
+    if refs < 2 * window_size:
+        raise ValueError(f"memory budget {memory_budget:,} B is too small for windows of "
+                         f"{window_size:,} references (needs {2 * window_size * bytes_per_ref:,} B)")
+    return refs
+
+
+def window_group_size(memory_budget, window_size):
+    """Number of windows whose columns (at most window_size entries each) fit into memory_budget."""
+    return max(1, memory_budget // (BYTES_PER_ENTRY * window_size))
+
+
+# -----------------------------------------------------------------------------
+# Pass 1: windows -> column store
+# -----------------------------------------------------------------------------
+def write_window_columns(trace_file, store_dir, window_size, slide_step, memory_budget=MEMORY_BUDGET):
+    """
+    Same windows as prm.build_windows (start = 0, step, ..., full windows only),
+    written to disk as they complete. Returns (num_windows, num_entries).
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    pages_path, colptr_path, _ = store_paths(store_dir)
+    text = not (is_binary_trace(trace_file) or is_archive(trace_file))
+    # half of the budget for the block: charge every reference twice its cost
+    block_refs = budget_refs(memory_budget, window_size,
+                             2 * (TEXT_BYTES_PER_REF if text else BYTES_PER_REF)) - window_size
+    group = window_group_size(memory_budget // 2, window_size)
+
+    buffer = np.zeros(0, dtype=np.uint64)   # pages from the start of the next window on
+    skip = 0                                # references before the next window start still unread
+    num_windows = entries = 0
+    with open(pages_path, "wb") as pages_out, open(colptr_path, "wb") as colptr_out:
+        np.zeros(1, dtype="<i8").tofile(colptr_out)
+        for block in iter_address_blocks(trace_file, block_refs):
+            dropped = min(skip, len(block))
+            skip -= dropped
+            buffer = np.concatenate((buffer, block[dropped:] // np.uint64(PAGE_SIZE)))
+            starts = np.arange(0, len(buffer) - window_size + 1, slide_step)
+            if len(starts) == 0:
+                continue
+
+            for first in range(0, len(starts), group):
+                columns = [np.unique(buffer[s:s + window_size]) for s in starts[first:first + group].tolist()]
+                lengths = np.array([len(c) for c in columns], dtype=np.int64)
+                np.concatenate(columns).astype("<u8").tofile(pages_out)
+                (entries + np.cumsum(lengths)).astype("<i8").tofile(colptr_out)
+                entries += int(lengths.sum())
+                del columns
+            num_windows += len(starts)
+
+            # keep everything from the first window that is not complete yet; with
+            # slide_step > window_size that start can lie beyond the buffer
+            next_start = int(starts[-1]) + slide_step
+            skip = max(0, next_start - len(buffer))
+            buffer = buffer[next_start:]
+    return num_windows, entries
+
+
+def open_columns(store_dir):
+    pages_path, colptr_path, _ = store_paths(store_dir)
+    colptr = np.memmap(colptr_path, dtype="<i8", mode="r")
+    pages = np.memmap(pages_path, dtype="<u8", mode="r") if colptr[-1] else np.zeros(0, dtype=np.uint64)
+    return colptr, pages
+
+
+def iter_column_chunks(colptr, max_entries):
+    """
+    (first_window, colptr[first:last + 1]) for runs of windows whose entries fit
+    into max_entries (at least one window). Every window holds at least one
+    entry, so colptr is only read max_entries + 1 offsets at a time.
+    """
+    first, n = 0, len(colptr) - 1
+    while first < n:
+        ptr = np.asarray(colptr[first:first + max_entries + 1])
+        last = first + int(np.searchsorted(ptr, ptr[0] + max_entries, side="right")) - 1
+        last = min(max(last, first + 1), n)
+        yield first, ptr[:last - first + 1]
+        first = last
+
+
+# -----------------------------------------------------------------------------
+# Pass 2: row index and raster
+# -----------------------------------------------------------------------------
+def build_row_index(store_dir, memory_budget=MEMORY_BUDGET):
+    """Sorted unique pages over all windows, merged chunk by chunk and saved to rows.u64."""
+    colptr, pages = open_columns(store_dir)
+    rows = np.zeros(0, dtype=np.uint64)
+    for _, ptr in iter_column_chunks(colptr, memory_budget // BYTES_PER_REF):
+        rows = np.union1d(rows, np.asarray(pages[ptr[0]:ptr[-1]]))
+    rows.astype("<u8").tofile(store_paths(store_dir)[2])
+    return rows
+
+
+def rasterize(store_dir, rows, max_cells, row_codes=None):
+    """
+    Downsample the map to at most max_cells cells (rows x windows bins).
+    Cell value: 0 = not referenced, otherwise 1 + region code of the page
+    (1 without region codes); a bin shows the highest value of its pages.
+    """
+    colptr, pages = open_columns(store_dir)
+    num_windows = len(colptr) - 1
+    scale = max(1.0, np.sqrt(len(rows) * num_windows / max(max_cells, 1)))
+    height = max(1, int(np.ceil(len(rows) / scale)))
+    width = max(1, int(np.ceil(num_windows / scale)))
+    raster = np.zeros((height, width), dtype=np.uint8)
+
+    values = np.ones(len(rows), dtype=np.uint8) if row_codes is None else row_codes.astype(np.uint8) + 1
+    for first, ptr in iter_column_chunks(colptr, max_cells):
+        chunk = np.asarray(pages[ptr[0]:ptr[-1]])
+        windows = np.repeat(np.arange(first, first + len(ptr) - 1), np.diff(ptr))
+        row = np.searchsorted(rows, chunk)
+        np.maximum.at(raster, ((row * height) // len(rows), (windows * width) // num_windows), values[row])
+    return raster
+
+
+def plot_raster(raster, rows, trace_file, window_size, slide_step, region_names=None):
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import ListedColormap
+    from matplotlib.patches import Patch
+
+    if region_names is None:
+        colors, labels = ["white", "#1f77b4"], ["Not Referenced", "Referenced"]
+    else:
+        colors = ["white"] + [color_for_region(name) for name in region_names]
+        labels = ["Not Referenced"] + region_names
+    present = np.unique(raster)
+
+    plt.figure(figsize=(10, 8))
+    plt.imshow(raster, aspect="auto", cmap=ListedColormap(colors), vmin=0, vmax=len(colors) - 1,
+               interpolation="nearest", origin="lower")
+    plt.title(f"Page Reference Map for {trace_file}\n(WINDOW={window_size}, STEP={slide_step}, "
+              f"{raster.shape[0]}x{raster.shape[1]} cells)", fontsize=12, fontweight="bold")
+    plt.xlabel("Sliding Window Index (binned)")
+    plt.ylabel("Page Address (compact rows)")
+    ticks = np.unique(np.linspace(0, raster.shape[0] - 1, min(12, raster.shape[0])).round().astype(int))
+    plt.yticks(ticks, [f"0x{int(rows[t * len(rows) // raster.shape[0]]):x}" for t in ticks])
+    plt.legend(handles=[Patch(facecolor=colors[v], edgecolor="black", label=labels[v]) for v in present],
+               loc="upper left", fontsize=8, frameon=True)
+    plt.tight_layout()
+    plt.show()
+
+
+# -----------------------------------------------------------------------------
+# Driver
+# -----------------------------------------------------------------------------
+def out_of_core_page_map(trace_file, window_size, slide_step=None, map_file=None,
+                         memory_budget=MEMORY_BUDGET, store_dir=None, plot=True):
+    slide_step = slide_step or max(1, window_size // 10)
+    store_dir = store_dir or trace_file + ".prm"
+
+    num_windows, entries = write_window_columns(trace_file, store_dir, window_size, slide_step, memory_budget)
+    print(f"  Created {num_windows:,} sliding windows (step={slide_step}) -> {store_dir}")
+    if num_windows == 0:
+        print("No windows created (trace may be too short for this window size).")
+        return None
+
+    rows = build_row_index(store_dir, memory_budget)
+    print(f"  Unique pages: {len(rows):,}")
+    print(f"  Matrix density: {entries / (len(rows) * num_windows) * 100:.2f}%")
+
+    row_codes = region_names = None
+    if map_file:
+        from regions import REGION_NAMES, region_intervals, label_addresses
+        row_codes = label_addresses(rows * np.uint64(PAGE_SIZE), region_intervals(map_file))
+        region_names = REGION_NAMES
+
+    raster = rasterize(store_dir, rows, memory_budget // BYTES_PER_CELL, row_codes)
+    if plot:
+        plot_raster(raster, rows, trace_file, window_size, slide_step, region_names)
+    return rows, raster
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [3, 4, 5]:
+        print("Usage: python prm_ooc.py <trace_file> <window_size> [memory_budget_mb] [memory_map_file]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    window_size = int(sys.argv[2])
+    memory_budget = int(sys.argv[3]) << 20 if len(sys.argv) >= 4 else MEMORY_BUDGET
+    map_file = sys.argv[4] if len(sys.argv) == 5 else None
+    out_of_core_page_map(trace_file, window_size, map_file=map_file, memory_budget=memory_budget)
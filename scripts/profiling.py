@@ -0,0 +1,137 @@
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_FLAG = "--profile"
+MEMORY_FLAG = "--profile-memory"    # adds tracemalloc; slows the traced stages, so time in a separate run
+TOP_ALLOCATIONS = 5     # allocation sites kept from each stage snapshot
+
+
+def pop_profile_flags(argv):
+    """
+    Remove --profile / --profile-memory from argv (in place) and return
+    (enabled, trace_memory); --profile-memory implies --profile.
+    """
+    flags = {flag: flag in argv for flag in (PROFILE_FLAG, MEMORY_FLAG)}
+    for flag, given in flags.items():
+        if given:
+            argv.remove(flag)
+    return flags[PROFILE_FLAG] or flags[MEMORY_FLAG], flags[MEMORY_FLAG]
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# -----------------------------------------------------------------------------
+# Stage profiler
+# -----------------------------------------------------------------------------
+class Profiler:
+    """
+    Collects per-stage wall/CPU time, peak RSS and reference throughput
+    counters; with trace_memory also tracemalloc peaks with the top allocation
+    sites. tracemalloc hooks every allocation, so stage timings of a
+    memory-traced run are inflated; the snapshot work itself is kept out of
+    the stages and reported as tracing_overhead_seconds.
+    A disabled profiler turns every call into a no-op.
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory and enabled
+        self.stages = []
+        self.counters = {}
+        self.overhead = 0.0
+        self.started = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, refs=None):
+        """Time a block; refs (if known) is used for the throughput figure."""
+        if not self.enabled:
+            yield
+            return
+
+        if self.trace_memory:
+            overhead = time.perf_counter()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            self.overhead += time.perf_counter() - overhead
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            entry = {
+                "stage": name,
+                "wall_seconds": time.perf_counter() - wall,
+                "cpu_seconds": time.process_time() - cpu,
+                "peak_rss_bytes": peak_rss_bytes(),
+            }
+            if refs is not None:
+                entry["refs"] = refs
+                entry["refs_per_sec"] = refs / entry["wall_seconds"] if entry["wall_seconds"] > 0 else None
+            if self.trace_memory:
+                overhead = time.perf_counter()
+                current, peak = tracemalloc.get_traced_memory()
+                entry["traced_current_bytes"] = current
+                entry["traced_peak_bytes"] = peak
+                diff = tracemalloc.take_snapshot().compare_to(before, "lineno")
+                entry["top_allocations"] = [
+                    {"site": str(stat.traceback), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+                    for stat in diff[:TOP_ALLOCATIONS]
+                ]
+                self.overhead += time.perf_counter() - overhead
+            self.stages.append(entry)
+
+    def set_refs(self, refs):
+        """Attach a reference count to the last stage when it was unknown up front."""
+        if self.enabled and self.stages:
+            last = self.stages[-1]
+            last["refs"] = refs
+            last["refs_per_sec"] = refs / last["wall_seconds"] if last["wall_seconds"] > 0 else None
+
+    def count(self, name, value):
+        """Record a counter (e.g. number of references or unique pages)."""
+        if self.enabled:
+            self.counters[name] = value
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        return {
+            "command": " ".join(sys.argv),
+            "total_wall_seconds": total,
+            "memory_traced": self.trace_memory,
+            "tracing_overhead_seconds": self.overhead,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "counters": self.counters,
+            "stages": self.stages,
+        }
+
+    def write_report(self, path):
+        """Write the JSON report and print a one-line summary per stage."""
+        if not self.enabled:
+            return
+        report = self.report()
+        with open(path, "w") as out:
+            json.dump(report, out, indent=2)
+
+        print(f"\nProfile ({report['total_wall_seconds']:.3f}s total, "
+              f"peak RSS {report['peak_rss_bytes'] / 2**20:.1f} MiB):")
+        if self.trace_memory:
+            print(f"  memory tracing: {self.overhead:.3f}s of snapshots, stage times are inflated")
+        for s in self.stages:
+            line = f"  {s['stage']:<14s} {s['wall_seconds']:9.3f}s"
+            if s.get("refs_per_sec"):
+                line += f"  {s['refs_per_sec']:,.0f} refs/s"
+            if "traced_peak_bytes" in s:
+                line += f"  traced peak {s['traced_peak_bytes'] / 2**20:.1f} MiB"
+            print(line)
+        print(f"  report: {os.path.abspath(path)}")
@@ -0,0 +1,130 @@
+import sys
+import numpy as np
+from interning import load_interning, previous_occurrence
+from stride_profile import stride_profile, print_profile
+from prm import PAGE_SIZE, parse_memory_map, classify_page, find_main_executable_path
+
+# Label codes, in legend order of prm.py; "unknown" = not covered by the map
+REGION_NAMES = ["stack", "heap", "pin", "lib", "exec", "file", "anon",
+                "vdso", "vvar", "vsyscall", "unknown"]
+REGION_CODES = {name: code for code, name in enumerate(REGION_NAMES)}
+UNKNOWN = REGION_CODES["unknown"]
+
+
+# -----------------------------------------------------------------------------
+# Region label column
+# -----------------------------------------------------------------------------
+def region_intervals(map_file):
+    """Sorted (starts, ends, codes) byte intervals of the memory map, classified once per region."""
+    regions = parse_memory_map(map_file)
+    main_exec = find_main_executable_path(regions)
+    regions = sorted(regions, key=lambda r: r["start_page"])
+    starts = np.array([r["start_page"] * PAGE_SIZE for r in regions], dtype=np.uint64)
+    ends = np.array([r["end_page"] * PAGE_SIZE for r in regions], dtype=np.uint64)
+    codes = np.array([REGION_CODES[classify_page(r["start_page"], regions, main_exec)]
+                      for r in regions], dtype=np.uint8)
+    return starts, ends, codes
+
+
+def label_addresses(addresses, intervals):
+    """Region code for every address via a binary search over the interval starts."""
+    starts, ends, codes = intervals
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    if len(starts) == 0:
+        return np.full(len(addresses), UNKNOWN, dtype=np.uint8)
+    idx = np.searchsorted(starts, addresses, side="right") - 1
+    inside = idx >= 0
+    idx = np.maximum(idx, 0)
+    inside &= addresses < ends[idx]
+    return np.where(inside, codes[idx], UNKNOWN).astype(np.uint8)
+
+
+def label_trace(table, ids, map_file):
+    """Label column for an interned trace: the lookup runs on the unique table only."""
+    return label_addresses(table, region_intervals(map_file))[ids]
+
+
+def drop_region(ids, labels, region="pin"):
+    """Remove every reference of one region (e.g. Pin's own mappings)."""
+    keep = labels != REGION_CODES[region]
+    return np.asarray(ids)[keep], labels[keep]
+
+
+# -----------------------------------------------------------------------------
+# Per-region breakdowns
+# -----------------------------------------------------------------------------
+def region_counts(labels, mask=None):
+    """Count of references (or of references where mask is set) per region name."""
+    counts = np.bincount(labels if mask is None else labels[mask], minlength=len(REGION_NAMES))
+    return {REGION_NAMES[c]: int(n) for c, n in enumerate(counts) if n}
+
+
+def locality_by_region(addresses, ids, labels, window_size):
+    """
+    la.py metrics split by the region of the current reference: percentages
+    are relative to the references of that region.
+    """
+    diff = np.diff(addresses.astype(np.int64))
+    prev = previous_occurrence(ids)
+    distance = np.arange(len(ids)) - prev
+    indicators = {
+        "spatial": np.abs(diff) <= window_size,
+        "sequential": (diff > 0) & (diff <= 8),
+        "temporal": ((prev >= 0) & (distance <= window_size))[1:],
+    }
+    hits = {metric: region_counts(labels[1:], hit) for metric, hit in indicators.items()}
+    result = {}
+    for name, total in region_counts(labels).items():
+        row = {"references": total}
+        for metric in indicators:
+            row[metric] = hits[metric].get(name, 0) / total * 100
+        result[name] = row
+    return result
+
+
+def cycles_by_region(ids, labels):
+    """Repeated-address events per region and their median cycle length."""
+    prev = previous_occurrence(ids)
+    seen = np.flatnonzero(prev >= 0)
+    lengths = seen - prev[seen]
+    result = {}
+    for code in np.unique(labels[seen]).tolist():
+        region_lengths = lengths[labels[seen] == code]
+        result[REGION_NAMES[code]] = {
+            "cycles": len(region_lengths),
+            "median_length": float(np.median(region_lengths)),
+        }
+    return result
+
+
+if __name__ == "__main__":
+    drop_pin = "--drop-pin" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--drop-pin"]
+    if len(args) not in [2, 3]:
+        print("Usage: python regions.py <pinatrace_file> <memory_map_file> [window_size] [--drop-pin]")
+        sys.exit(1)
+
+    trace_file, map_file = args[0], args[1]
+    window_size = int(args[2]) if len(args) == 3 else 100
+
+    table, ids = load_interning(trace_file)
+    ids = np.asarray(ids)
+    labels = label_trace(table, ids, map_file)
+    print("References per region:", region_counts(labels))
+
+    if drop_pin:
+        ids, labels = drop_region(ids, labels, "pin")
+        print(f"Dropped pin accesses, {len(ids):,} references left")
+
+    addresses = table[ids]
+    print(f"\nLocality by region (window_size = {window_size}):")
+    for name, row in locality_by_region(addresses, ids, labels, window_size).items():
+        print(f"  {name:<9s} {row['references']:>10,d} refs  spatial {row['spatial']:6.2f}%  "
+              f"sequential {row['sequential']:6.2f}%  temporal {row['temporal']:6.2f}%")
+
+    print("\nCycles by region:")
+    for name, row in cycles_by_region(ids, labels).items():
+        print(f"  {name:<9s} {row['cycles']:>10,d} cycles, median length {row['median_length']:g}")
+
+    print()
+    print_profile(stride_profile(addresses, labels=labels, label_names=REGION_NAMES))
@@ -8,7 +8,7 @@ def analyze_sequential_locality(file_path, output_path=None):
     total_accesses = len(addresses)
     if total_accesses < 2:
         print("Not enough addresses to analyze sequential locality.")
-        return
+        return Counter()
 
     stride_histogram = Counter()
 
@@ -37,6 +37,8 @@ def analyze_sequential_locality(file_path, output_path=None):
     #         for line in lines:
     #             out_file.write(line + '\n')
 
+    return stride_histogram
+
 if __name__ == "__main__":
     if len(sys.argv) not in [2, 3]:
         print("Usage: python sequential_locality_analysis.py <input_file> [output_file]")
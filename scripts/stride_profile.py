@@ -0,0 +1,155 @@
+import sys
+import numpy as np
+from trace_io import read_addresses
+
+# Granularity -> address shift (byte, 64B cache line, 4KB page)
+GRANULARITY_SHIFTS = {"byte": 0, "line": 6, "page": 12}
+REGION_SHIFT = 32       # default per-region breakdown: 4GB address regions
+MIN_RUN = 2             # strides in a row needed to count as a stride run
+
+
+# -----------------------------------------------------------------------------
+# Stride computations
+# -----------------------------------------------------------------------------
+def to_units(addresses, granularity="byte"):
+    """Address stream at the given granularity (signed, so strides can be negative)."""
+    shift = GRANULARITY_SHIFTS[granularity]
+    return (np.asarray(addresses, dtype=np.uint64) >> np.uint64(shift)).astype(np.int64)
+
+
+def stride_histogram(strides):
+    """Full signed histogram: (stride values, counts), sorted by stride."""
+    return np.unique(strides, return_counts=True)
+
+
+def top_strides(values, counts, top_k):
+    order = np.argsort(counts, kind="stable")[::-1][:top_k]
+    return [(int(values[i]), int(counts[i])) for i in order]
+
+
+def stride_runs(strides, min_run=MIN_RUN):
+    """
+    Maximal sequences of equal consecutive strides.
+    Returns (run_start, run_length, run_stride) arrays, run_start indexes the strides
+    (stride i is between references i and i+1), only runs with >= min_run strides.
+    """
+    if len(strides) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    change = np.flatnonzero(strides[1:] != strides[:-1]) + 1
+    starts = np.concatenate(([0], change))
+    lengths = np.diff(np.concatenate((starts, [len(strides)])))
+    keep = lengths >= min_run
+    return starts[keep], lengths[keep], strides[starts[keep]]
+
+
+def per_group_top(groups, strides, top_k):
+    """For every group label: number of strides and its top_k strides."""
+    order = np.lexsort((strides, groups))
+    g, s = groups[order], strides[order]
+    boundary = np.flatnonzero((g[1:] != g[:-1]) | (s[1:] != s[:-1])) + 1
+    starts = np.concatenate(([0], boundary)) if len(g) else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.concatenate((starts, [len(g)])))
+    pair_group, pair_stride = g[starts], s[starts]
+
+    result = {}
+    for label in np.unique(pair_group).tolist():
+        sel = pair_group == label
+        result[label] = {
+            "strides": int(counts[sel].sum()),
+            "top": top_strides(pair_stride[sel], counts[sel], top_k),
+        }
+    return result
+
+
+# -----------------------------------------------------------------------------
+# Profile
+# -----------------------------------------------------------------------------
+def stride_profile(addresses, granularity="byte", top_k=10, min_run=MIN_RUN,
+                   region_shift=REGION_SHIFT, labels=None, label_names=None):
+    """
+    Signed stride profile of an address stream.
+
+    Strides are measured between consecutive references in units of the
+    granularity. The per-region breakdown groups each stride by the region of
+    the reference it lands on: by default the address >> region_shift, or the
+    given per-reference labels (with optional label_names for the codes).
+    """
+    addresses = np.asarray(addresses, dtype=np.uint64)
+    units = to_units(addresses, granularity)
+    strides = np.diff(units)
+    total = len(strides)
+
+    values, counts = stride_histogram(strides)
+    run_start, run_len, run_stride = stride_runs(strides, min_run)
+
+    # Strides covered by runs, per run stride
+    run_values, run_inverse = np.unique(run_stride, return_inverse=True)
+    covered = np.bincount(run_inverse, weights=run_len, minlength=len(run_values))
+    longest = np.argsort(run_len, kind="stable")[::-1][:top_k]
+
+    if labels is None:
+        groups = (addresses[1:] >> np.uint64(region_shift)).astype(np.int64)
+    else:
+        groups = np.asarray(labels)[1:].astype(np.int64)
+    regions = per_group_top(groups, strides, top_k)
+    if label_names is not None:
+        regions = {label_names[k]: v for k, v in regions.items()}
+    elif labels is None:
+        regions = {f"0x{k << region_shift:x}": v for k, v in regions.items()}
+
+    hist = dict(zip(values.tolist(), counts.tolist()))
+    return {
+        "granularity": granularity,
+        "references": len(addresses),
+        "strides": total,
+        "histogram": hist,
+        "top": top_strides(values, counts, top_k),
+        "forward": {s: hist.get(s, 0) for s in range(1, 9)},   # legacy +1..+8 view
+        "runs": {
+            "count": len(run_len),
+            "strides_in_runs": int(run_len.sum()),
+            "by_stride": sorted(zip(run_values.tolist(), covered.astype(int).tolist()),
+                                key=lambda kv: kv[1], reverse=True)[:top_k],
+            "longest": [(int(run_stride[i]), int(run_start[i]), int(run_len[i])) for i in longest],
+        },
+        "regions": regions,
+    }
+
+
+def print_profile(profile):
+    total = max(profile["strides"], 1)
+    unit = {"byte": "B", "line": " lines", "page": " pages"}[profile["granularity"]]
+
+    print(f"Stride profile ({profile['granularity']} granularity, "
+          f"{profile['references']:,} references, {len(profile['histogram']):,} distinct strides)")
+
+    print(f"Top {len(profile['top'])} strides:")
+    for stride, count in profile["top"]:
+        print(f"  {stride:+d}{unit}: {count} ({count / total * 100:.2f}%)")
+
+    runs = profile["runs"]
+    print(f"Stride runs: {runs['count']:,} runs covering {runs['strides_in_runs']:,} strides "
+          f"({runs['strides_in_runs'] / total * 100:.2f}%)")
+    for stride, covered in runs["by_stride"]:
+        print(f"  {stride:+d}{unit}: {covered} strides in runs")
+    print("Longest runs (stride, start, length):")
+    for stride, start, length in runs["longest"]:
+        print(f"  {stride:+d}{unit} at {start}: {length}")
+
+    print("Per-region breakdown:")
+    for region, info in profile["regions"].items():
+        top = ", ".join(f"{s:+d}{unit}:{c}" for s, c in info["top"][:5])
+        print(f"  {region}: {info['strides']} strides  [{top}]")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3, 4]:
+        print("Usage: python stride_profile.py <trace_file> [byte|line|page] [top_k]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    granularity = sys.argv[2] if len(sys.argv) >= 3 else "byte"
+    top_k = int(sys.argv[3]) if len(sys.argv) == 4 else 10
+
+    print_profile(stride_profile(read_addresses(trace_file), granularity, top_k))
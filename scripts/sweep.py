@@ -0,0 +1,272 @@
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool, shared_memory
+import numpy as np
+from interning import load_interning, previous_occurrence, next_occurrence
+from multi_granularity import coarsen, alignment_counts
+from working_set import working_set_range
+
+# -----------------------------------------------------------------------------
+# Parameter sweeps over one trace with worker processes attached zero-copy.
+# The parent interns the trace once and places every point-independent
+# trace-length array in shared memory, per unit size:
+#   absdiff<s>        sorted |unit deltas|           (locality: spatial, same)
+#   reuse<s>          sorted reuse distances t-prev  (locality: temporal; cache: faults)
+#   lifetime<s>(_sum) sorted min(next, N) - t, prefix sums (cache: mean resident size)
+#   prev<s>, next<s>  previous / next occurrence     (page_map, scanned in chunks)
+# Workers map the same segments and answer a point with searchsorted, or with
+# a scan in CHUNK_REFS pieces, so memory holds one copy of every array and
+# a worker's temporaries stay bounded however many workers run.
+# Results stream back as points finish.
+#
+# A point is a dict: {"kind": "locality" | "page_map" | "cache", ...}
+#   locality  window_size, unit_size   la.py metrics (unit_size 1 = bytes)
+#   page_map  window, step, unit_size  unique pages per prm.py sliding window
+#   cache     tau, unit_size           working-set policy: fault rate and
+#                                      mean resident units for a window tau
+# -----------------------------------------------------------------------------
+DEFAULT_UNIT = {"locality": 1, "page_map": 4096, "cache": 4096}
+CHUNK_REFS = 1 << 20        # references per step of a worker's page-map scan
+
+
+# -----------------------------------------------------------------------------
+# Shared arrays
+# -----------------------------------------------------------------------------
+class SharedArrays:
+    """Named numpy arrays backed by shared memory segments."""
+
+    def __init__(self):
+        self.segments = {}
+        self.arrays = {}
+        self.owner = False
+
+    @classmethod
+    def create(cls, arrays):
+        shared = cls()
+        shared.owner = True
+        for name, array in arrays.items():
+            shared.add(name, array)
+        return shared
+
+    def add(self, name, array):
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+        view[...] = array
+        self.segments[name], self.arrays[name] = shm, view
+        return view
+
+    @property
+    def spec(self):
+        """Picklable description used by workers to attach: name -> (segment, shape, dtype)."""
+        return {name: (self.segments[name].name, a.shape, a.dtype.str) for name, a in self.arrays.items()}
+
+    @classmethod
+    def attach(cls, spec):
+        shared = cls()
+        for name, (segment, shape, dtype) in spec.items():
+            shm = shared_memory.SharedMemory(name=segment)
+            shared.segments[name] = shm
+            shared.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        return shared
+
+    def close(self):
+        self.arrays.clear()     # views must be released before the buffers
+        for shm in self.segments.values():
+            shm.close()
+            if self.owner:
+                shm.unlink()
+        self.segments.clear()
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def unit_shift(unit_size):
+    shift = int(unit_size).bit_length() - 1
+    if unit_size <= 0 or 1 << shift != unit_size:
+        raise ValueError(f"unit_size must be a power of two, got {unit_size}")
+    return shift
+
+
+def share_trace(trace_file, points):
+    """Intern the trace and share the arrays every point of the sweep reads."""
+    table, ids = load_interning(trace_file)
+    ids = np.asarray(ids)
+    addresses = table[ids]
+    n = len(ids)
+    alignment = alignment_counts(addresses)
+    shared = SharedArrays.create({
+        "refs": np.array([n], dtype=np.int64),
+        "alignment": np.array([list(alignment), list(alignment.values())], dtype=np.int64),
+    })
+
+    kinds = {}
+    for p in points:
+        kinds.setdefault(unit_shift(p.get("unit_size", DEFAULT_UNIT[p["kind"]])), set()).add(p["kind"])
+    for shift, needed in sorted(kinds.items()):
+        unit_ids = coarsen(table, ids, shift)[1]
+        prev = previous_occurrence(unit_ids)
+        if "locality" in needed:
+            diff = np.diff((addresses >> np.uint64(shift)).astype(np.int64))
+            sequential_max = 8 if shift == 0 else 1
+            shared.add(f"absdiff{shift}", np.sort(np.abs(diff)))
+            shared.add(f"sequential{shift}", np.array([np.count_nonzero((diff > 0) & (diff <= sequential_max))]))
+            del diff
+        if needed & {"locality", "cache"}:
+            seen = np.flatnonzero(prev >= 0)
+            shared.add(f"reuse{shift}", np.sort(seen - prev[seen]))
+            del seen
+        if needed & {"page_map", "cache"}:
+            nxt = next_occurrence(unit_ids)
+            if "cache" in needed:
+                lifetime = np.sort(np.minimum(nxt, n) - np.arange(n))
+                shared.add(f"lifetime{shift}", lifetime)
+                shared.add(f"lifetime_sum{shift}", np.concatenate(([0], np.cumsum(lifetime))))
+                del lifetime
+            if "page_map" in needed:
+                shared.add(f"prev{shift}", prev)
+                shared.add(f"next{shift}", nxt)
+            del nxt
+    return shared
+
+
+# -----------------------------------------------------------------------------
+# Point evaluation (runs in the workers)
+# -----------------------------------------------------------------------------
+_shared = None
+
+
+def _attach(spec):
+    global _shared
+    _shared = SharedArrays.attach(spec)
+
+
+def count_at_most(sorted_values, limit):
+    return int(np.searchsorted(sorted_values, limit, side="right"))
+
+
+def eval_locality(shared, window_size=100, unit_size=1):
+    """la.py metrics (multi_granularity.locality_counts) from the sorted distances."""
+    shift = unit_shift(unit_size)
+    absdiff = shared[f"absdiff{shift}"]
+    counts = {
+        "spatial": count_at_most(absdiff, window_size if shift == 0 else 1),
+        "sequential": int(shared[f"sequential{shift}"][0]),
+        "temporal": count_at_most(shared[f"reuse{shift}"], window_size),
+        "same": count_at_most(absdiff, 0),
+    }
+    total = max(int(shared["refs"][0]), 1)
+    result = {k: v / total * 100 for k, v in counts.items()}
+    if shift == 0:
+        sizes, aligned = shared["alignment"]
+        result["alignment"] = dict(zip(sizes.tolist(), aligned.tolist()))
+    return result
+
+
+def eval_page_map(shared, window=5000, step=None, unit_size=4096):
+    """Unique units per prm.py window: W(t, window) at every window end, CHUNK_REFS at a time."""
+    shift = unit_shift(unit_size)
+    prev, nxt = shared[f"prev{shift}"], shared[f"next{shift}"]
+    step = step or max(1, window // 10)
+    ends = np.arange(window - 1, len(prev), step)
+    unique = np.empty(len(ends), dtype=np.int64)
+    level = 0
+    for start in range(0, len(prev), CHUNK_REFS):
+        stop = min(start + CHUNK_REFS, len(prev))
+        series = working_set_range(prev, nxt, window, start, stop) + level
+        lo, hi = np.searchsorted(ends, [start, stop])
+        unique[lo:hi] = series[ends[lo:hi] - start]
+        level = series[-1]
+    return {
+        "windows": len(unique),
+        "mean_unique": float(unique.mean()) if len(unique) else 0.0,
+        "max_unique": int(unique.max()) if len(unique) else 0,
+    }
+
+
+def eval_cache(shared, tau=1000, unit_size=4096):
+    """
+    working_set.fault_rate_curve / mean_working_set_curve at one tau:
+      faults       references without a reuse within tau
+      mean resident sum_i min(tau, lifetime_i) / N
+    """
+    shift = unit_shift(unit_size)
+    n = int(shared["refs"][0])
+    tau = min(int(tau), n)
+    lifetime, lifetime_sum = shared[f"lifetime{shift}"], shared[f"lifetime_sum{shift}"]
+    shorter = int(np.searchsorted(lifetime, tau, side="left"))
+    mean_resident = (int(lifetime_sum[shorter]) + tau * (n - shorter)) / max(n, 1)
+    return {
+        "fault_rate": 1.0 - count_at_most(shared[f"reuse{shift}"], tau) / max(n, 1),
+        "mean_resident": mean_resident,
+        "resident_bytes": mean_resident * unit_size,
+    }
+
+
+EVALUATORS = {"locality": eval_locality, "page_map": eval_page_map, "cache": eval_cache}
+
+
+def evaluate(point, shared=None):
+    shared = shared or _shared
+    params = {k: v for k, v in point.items() if k != "kind"}
+    started = time.perf_counter()
+    result = EVALUATORS[point["kind"]](shared, **params)
+    return {"point": point, "result": result, "seconds": time.perf_counter() - started}
+
+
+# -----------------------------------------------------------------------------
+# Executor
+# -----------------------------------------------------------------------------
+def sweep(trace_file, points, workers=None):
+    """Yield one result dict per point, in completion order."""
+    points = list(points)
+    for p in points:
+        if p["kind"] not in EVALUATORS:
+            raise ValueError(f"unknown sweep kind '{p['kind']}'")
+    with share_trace(trace_file, points) as shared:
+        if workers == 1:
+            for point in points:
+                yield evaluate(point, shared)
+            return
+        with Pool(workers, initializer=_attach, initargs=(shared.spec,)) as pool:
+            yield from pool.imap_unordered(evaluate, points)
+
+
+def default_points(window_sizes=None, page_windows=(1000, 5000, 20000), taus=None):
+    """locality over la.py's window sizes, page maps at 4KB/2MB, cache taus at lines/pages."""
+    window_sizes = np.logspace(0, 3, num=10, dtype=int) if window_sizes is None else window_sizes
+    taus = np.logspace(1, 5, num=9, dtype=int) if taus is None else taus
+    points = [{"kind": "locality", "window_size": int(w)} for w in window_sizes]
+    points += [{"kind": "page_map", "window": w, "unit_size": size}
+               for size in (4096, 1 << 21) for w in page_windows]
+    points += [{"kind": "cache", "tau": int(t), "unit_size": size} for size in (64, 4096) for t in taus]
+    return points
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3, 4]:
+        print("Usage: python sweep.py <trace_file> [workers] [points.json]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    workers = int(sys.argv[2]) if len(sys.argv) >= 3 else os.cpu_count()
+    if len(sys.argv) == 4:
+        with open(sys.argv[3]) as f:
+            points = json.load(f)
+    else:
+        points = default_points()
+
+    started = time.perf_counter()
+    for row in sweep(trace_file, points, workers):
+        print(json.dumps(row), flush=True)
+    print(f"{len(points)} points with {workers} workers in {time.perf_counter() - started:.2f}s",
+          file=sys.stderr)
@@ -0,0 +1,100 @@
+import sys
+import numpy as np
+from trace_io import BLOCK_SIZE, write_trace
+
+BASE_ADDR = 0x7f0000000000  # start of the synthetic address space
+
+
+# -----------------------------------------------------------------------------
+# Generators
+# Every generator yields uint64 blocks so traces up to 10^9 references can be
+# written without holding them in memory.
+# -----------------------------------------------------------------------------
+def _block_ranges(n, block_size):
+    for start in range(0, n, block_size):
+        yield start, min(n, start + block_size)
+
+
+def sequential(n, stride=8, base=BASE_ADDR, block_size=BLOCK_SIZE, seed=0):
+    """Linear sweep over memory with a fixed small stride."""
+    for start, end in _block_ranges(n, block_size):
+        idx = np.arange(start, end, dtype=np.uint64)
+        yield np.uint64(base) + idx * np.uint64(stride)
+
+
+def strided(n, stride=256, span=1 << 24, base=BASE_ADDR, block_size=BLOCK_SIZE, seed=0):
+    """Constant large stride, wrapping around inside a span of bytes."""
+    for start, end in _block_ranges(n, block_size):
+        idx = np.arange(start, end, dtype=np.uint64)
+        yield np.uint64(base) + (idx * np.uint64(stride)) % np.uint64(span)
+
+
+def uniform(n, span=1 << 30, align=8, base=BASE_ADDR, block_size=BLOCK_SIZE, seed=0):
+    """Uniform random aligned accesses inside a span of bytes."""
+    rng = np.random.default_rng(seed)
+    slots = span // align
+    for start, end in _block_ranges(n, block_size):
+        idx = rng.integers(0, slots, size=end - start, dtype=np.uint64)
+        yield np.uint64(base) + idx * np.uint64(align)
+
+
+def zipf(n, items=1 << 16, alpha=1.2, item_size=64, base=BASE_ADDR, block_size=BLOCK_SIZE, seed=0):
+    """Zipfian hot set: a few items take most accesses, items scattered in memory."""
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, items + 1, dtype=np.float64) ** alpha
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    placement = rng.permutation(items).astype(np.uint64)   # rank -> item slot
+    for start, end in _block_ranges(n, block_size):
+        ranks = np.searchsorted(cdf, rng.random(end - start), side="right")
+        ranks = np.minimum(ranks, items - 1)
+        yield np.uint64(base) + placement[ranks] * np.uint64(item_size)
+
+
+def loop_nest(n, rows=512, cols=512, elem=8, base=BASE_ADDR, block_size=BLOCK_SIZE, seed=0):
+    """
+    Two-level loop nest reading A[i][j] and B[j][i] alternately
+    (row-major walk over A, column-major walk over B).
+    """
+    a_base = np.uint64(base)
+    b_base = np.uint64(base + rows * cols * elem)
+    for start, end in _block_ranges(n, block_size):
+        k = np.arange(start, end, dtype=np.uint64)
+        pair = k // np.uint64(2)
+        i = (pair // np.uint64(cols)) % np.uint64(rows)
+        j = pair % np.uint64(cols)
+        a = a_base + (i * np.uint64(cols) + j) * np.uint64(elem)
+        b = b_base + (j * np.uint64(rows) + i) * np.uint64(elem)
+        yield np.where(k % np.uint64(2) == 0, a, b)
+
+
+GENERATORS = {
+    "sequential": sequential,
+    "strided": strided,
+    "uniform": uniform,
+    "zipf": zipf,
+    "loop_nest": loop_nest,
+}
+
+
+def generate_trace(pattern, n, output_file, seed=0):
+    """Write n references of the given pattern to a text or binary (.bin) trace."""
+    if pattern not in GENERATORS:
+        raise ValueError(f"Unknown pattern '{pattern}', choose from {sorted(GENERATORS)}")
+    return write_trace(output_file, GENERATORS[pattern](n, seed=seed))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [4, 5]:
+        print("Usage: python synthetic_traces.py <pattern> <num_references> <output_file> [seed]")
+        print(f"  patterns: {', '.join(GENERATORS)}")
+        print("  output ending with .bin is written as raw uint64, otherwise as hex text")
+        sys.exit(1)
+
+    pattern = sys.argv[1]
+    num_refs = int(float(sys.argv[2]))   # allow 1e6 style sizes
+    output_file = sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+
+    written = generate_trace(pattern, num_refs, output_file, seed)
+    print(f"Wrote {written:,} references ({pattern}) to '{output_file}'.")
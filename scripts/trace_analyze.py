@@ -0,0 +1,204 @@
+import argparse
+import sys
+import numpy as np
+from interning import load_interning, format_address, previous_occurrence
+from multi_granularity import ALIGNMENT_SIZES, analyze_locality_vectorized
+from stride_profile import GRANULARITY_SHIFTS, stride_profile, print_profile
+from trace_io import read_addresses
+
+# -----------------------------------------------------------------------------
+# Single entry point for the trace analyses:
+#   python trace_analyze.py <locality|stride|cycles|graph|degrees|prm> ...
+# Only numpy is imported up front; matplotlib and igraph are loaded by the
+# subcommands that plot (--plot) or build an igraph graph, so numeric runs
+# start fast and every subcommand can also be called as a library function.
+# -----------------------------------------------------------------------------
+
+
+# -----------------------------------------------------------------------------
+# Library functions (no printing, no plotting unless asked)
+# -----------------------------------------------------------------------------
+def locality(trace_file, window_size=100, alignment_sizes=ALIGNMENT_SIZES):
+    """la.py metrics: spatial/sequential/temporal percentages, alignment counts, references."""
+    addresses = read_addresses(trace_file)
+    result = analyze_locality_vectorized(addresses, window_size, alignment_sizes)
+    result["references"] = len(addresses)
+    return result
+
+
+def locality_sweep(trace_file, window_sizes, alignment_sizes=ALIGNMENT_SIZES):
+    """locality() for several window sizes; the trace is read, interned and scanned once."""
+    table, ids = load_interning(trace_file)
+    ids = np.asarray(ids)
+    addresses = table[ids]
+    prev = previous_occurrence(ids)
+    results = []
+    for window_size in window_sizes:
+        result = analyze_locality_vectorized(addresses, int(window_size), alignment_sizes, ids, prev)
+        result["references"] = len(addresses)
+        results.append(result)
+    return results
+
+
+def stride(trace_file, granularity="byte", top_k=10):
+    """Signed stride profile (stride_profile.py)."""
+    return stride_profile(read_addresses(trace_file), granularity, top_k)
+
+
+def cycles(trace_file, plot=False):
+    """Cycle length -> count (trace_cycles.py), from the cached interning."""
+    from trace_cycles import cycles_from_ids, plot_cycle_histogram
+    _, ids = load_interning(trace_file)
+    result = cycles_from_ids(ids)
+    if plot:
+        plot_cycle_histogram(result, title=f"Cycle Length Histogram (N = {sum(result.values())} cycles)")
+    return result
+
+
+def graph(trace_file, output_file=None, workers=None):
+    """
+    igraph transition graph (make_graph.py), optionally written as GraphML.
+    With workers, the weighted graph counted in parallel (one edge per distinct transition).
+    """
+    from make_graph import build_graph_from_ids, build_weighted_graph_from_ids
+    table, ids = load_interning(trace_file)
+    g = build_weighted_graph_from_ids(table, ids, workers) if workers else build_graph_from_ids(table, ids)
+    if output_file:
+        g.write_graphml(output_file)
+    return g
+
+
+def degrees(path):
+    """
+    (names, in, out, total) degrees as in degree_hist.py. A trace is counted
+    directly from its interned ids (no igraph); a .graphml file is read with igraph.
+    """
+    if path.endswith(".graphml"):
+        from igraph import Graph
+        g = Graph.Read_GraphML(path)
+        names = g.vs["name"] if "name" in g.vs.attributes() else list(range(g.vcount()))
+        indeg = np.array(g.degree(mode="IN"), dtype=np.int64)
+        outdeg = np.array(g.degree(mode="OUT"), dtype=np.int64)
+    else:
+        table, ids = load_interning(path)
+        ids = np.asarray(ids, dtype=np.int64)
+        names = [format_address(addr) for addr in table.tolist()]
+        # every consecutive pair is one edge of the (multi)graph built by make_graph.py
+        indeg = np.bincount(ids[1:], minlength=len(table))
+        outdeg = np.bincount(ids[:-1], minlength=len(table))
+    return names, indeg, outdeg, indeg + outdeg
+
+
+def page_map(trace_file, window_size=None, map_file=None, plot=False):
+    """prm.py page reference map: (sorted_pages, matrix, region_labels)."""
+    import prm
+    pages = (read_addresses(trace_file) // np.uint64(prm.PAGE_SIZE)).tolist()
+    prm.WINDOW_SIZE = window_size or max(100, len(pages) // 30)
+    prm.SLIDE_STEP = max(1, prm.WINDOW_SIZE // 10)
+    return prm.create_page_reference_map(trace_file, pages, map_file, plot=plot)
+
+
+# -----------------------------------------------------------------------------
+# Command line
+# -----------------------------------------------------------------------------
+def run_locality(args):
+    result = locality(args.trace_file, args.window_size)
+    total = max(result["references"], 1)
+    print(f"Spatial Locality: {result['spatial']:.2f}%")
+    print(f"Sequential Locality: {result['sequential']:.2f}%")
+    print(f"Temporal Locality: {result['temporal']:.2f}%")
+    print("Address Alignment Statistics:")
+    for align, count in result["alignment"].items():
+        print(f"  Aligned to {align}B: {count} ({count / total * 100:.2f}%)")
+
+
+def run_stride(args):
+    print_profile(stride(args.trace_file, args.granularity, args.top))
+
+
+def run_cycles(args):
+    result = cycles(args.trace_file, args.plot)
+    print(f"Detected cycles (repeated addr events): {sum(result.values()):,}")
+    top = sorted(result.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+    print(f"Top {len(top)} most frequent cycle lengths (length -> count):")
+    for length, count in top:
+        print(f"  {length}\t{count}")
+
+
+def run_graph(args):
+    g = graph(args.trace_file, args.output, args.workers)
+    print(f"Vertices: {g.vcount()}, Edges: {g.ecount()}")
+    print(f"Graph saved as '{args.output}'.")
+
+
+def run_degrees(args):
+    names, indeg, outdeg, total = degrees(args.path)
+    print(f"Vertices: {len(names):,}, Edges: {int(indeg.sum()):,}")
+    for label, values in (("IN", indeg), ("OUT", outdeg), ("TOTAL", total)):
+        print(f"\nTOP {args.top} vertices by {label}-degree (max {int(values.max()) if len(values) else 0}):")
+        for vid in np.argsort(values, kind="stable")[::-1][:args.top].tolist():
+            print(f"  {names[vid]}\tdegree={int(values[vid])}")
+    if args.plot:
+        from degree_hist import plot_hist_full
+        plot_hist_full(indeg.tolist(), "In-Degree Histogram", "In-degree")
+        plot_hist_full(outdeg.tolist(), "Out-Degree Histogram", "Out-degree")
+        plot_hist_full(total.tolist(), "Total Degree Histogram", "Degree (in+out)")
+
+
+def run_prm(args):
+    page_map(args.trace_file, args.window_size, args.map_file, args.plot)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="trace_analyze.py", description="Memory trace analyses")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("locality", help="spatial/sequential/temporal locality (la.py)")
+    p.add_argument("trace_file")
+    p.add_argument("window_size", type=int, nargs="?", default=100)
+    p.set_defaults(run=run_locality)
+
+    p = sub.add_parser("stride", help="signed stride profile")
+    p.add_argument("trace_file")
+    p.add_argument("granularity", nargs="?", default="byte", choices=sorted(GRANULARITY_SHIFTS))
+    p.add_argument("--top", type=int, default=10)
+    p.set_defaults(run=run_stride)
+
+    p = sub.add_parser("cycles", help="cycle length histogram (trace_cycles.py)")
+    p.add_argument("trace_file")
+    p.add_argument("--top", type=int, default=15)
+    p.add_argument("--plot", action="store_true")
+    p.set_defaults(run=run_cycles)
+
+    p = sub.add_parser("graph", help="GraphML transition graph (make_graph.py, needs igraph)")
+    p.add_argument("trace_file")
+    p.add_argument("output", nargs="?", default="trace_graph.graphml")
+    p.add_argument("--workers", type=int, help="weighted graph counted by this many processes")
+    p.set_defaults(run=run_graph)
+
+    p = sub.add_parser("degrees", help="vertex degrees of a trace or .graphml (degree_hist.py)")
+    p.add_argument("path")
+    p.add_argument("--top", type=int, default=15)
+    p.add_argument("--plot", action="store_true")
+    p.set_defaults(run=run_degrees)
+
+    p = sub.add_parser("prm", help="page reference map (prm.py)")
+    p.add_argument("trace_file")
+    p.add_argument("window_size", type=int, nargs="?", default=None)
+    p.add_argument("--map", dest="map_file", default=None, help="memory map file for region colors")
+    p.add_argument("--plot", action="store_true")
+    p.set_defaults(run=run_prm)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(args)
+    except FileNotFoundError as e:
+        print(f"Error: file not found: {e.filename}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import lzma
+import os
+import struct
+import sys
+import zlib
+import numpy as np
+from trace_io import ARCHIVE_MAGIC, iter_address_blocks, write_trace
+
+# -----------------------------------------------------------------------------
+# .trz layout
+#   header:  b"TRZ1" | uint32 block_size | uint8 codec | 3 pad bytes
+#   blocks:  codec(zigzag varint of the deltas after the block's first address)
+#   index:   uint64[num_blocks] x (offset, stored_length, count, first_address)
+#   footer:  uint64 num_blocks | uint64 index_offset | b"TRZI"
+# -----------------------------------------------------------------------------
+MAGIC = ARCHIVE_MAGIC
+FOOTER_MAGIC = b"TRZI"
+HEADER = struct.Struct("<4sIB3x")
+FOOTER = struct.Struct("<QQ4s")
+BLOCK_SIZE = 1 << 16
+CODECS = {"none": 0, "zlib": 1, "lzma": 2}
+CODEC_NAMES = {v: k for k, v in CODECS.items()}
+
+
+# -----------------------------------------------------------------------------
+# Zigzag + varint (vectorized)
+# -----------------------------------------------------------------------------
+def zigzag_encode(deltas):
+    d = np.asarray(deltas, dtype=np.int64)
+    return ((d << np.int64(1)) ^ (d >> np.int64(63))).view(np.uint64)
+
+
+def zigzag_decode(values):
+    z = np.asarray(values, dtype=np.uint64)
+    return (z >> np.uint64(1)) ^ (np.uint64(0) - (z & np.uint64(1)))
+
+
+def varint_encode(values):
+    """LEB128: 7 bits per byte, high bit set on all but the last byte of a value."""
+    v = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(v), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += v >= np.uint64(1 << (7 * k))
+    starts = np.cumsum(nbytes) - nbytes
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for j in range(10):
+        sel = np.flatnonzero(nbytes > j)
+        if len(sel) == 0:
+            break
+        byte = (v[sel] >> np.uint64(7 * j)) & np.uint64(0x7F)
+        more = (nbytes[sel] > j + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[sel] + j] = (byte | more).astype(np.uint8)
+    return out
+
+
+def varint_decode(data):
+    b = np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray)) else data
+    if len(b) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    ends = np.flatnonzero(b < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    group = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    shift = (np.arange(len(b)) - starts[group]) * 7
+    parts = (b & 0x7F).astype(np.uint64) << shift.astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+
+# -----------------------------------------------------------------------------
+# Blocks
+# -----------------------------------------------------------------------------
+def encode_block(addresses, codec):
+    deltas = np.diff(np.asarray(addresses, dtype=np.uint64)).view(np.int64)   # wraps mod 2^64
+    payload = varint_encode(zigzag_encode(deltas)).tobytes()
+    if codec == CODECS["zlib"]:
+        return zlib.compress(payload, 6)
+    if codec == CODECS["lzma"]:
+        return lzma.compress(payload)
+    return payload
+
+
+def decode_block(payload, count, first, codec):
+    if codec == CODECS["zlib"]:
+        payload = zlib.decompress(payload)
+    elif codec == CODECS["lzma"]:
+        payload = lzma.decompress(payload)
+    out = np.empty(count, dtype=np.uint64)
+    out[0] = first
+    out[1:] = zigzag_decode(varint_decode(payload))
+    return np.cumsum(out, dtype=np.uint64)           # uint64 cumsum wraps like the deltas
+
+
+def encode_trace(input_path, output_path, codec="zlib", block_size=BLOCK_SIZE):
+    """Stream a text or binary trace into a .trz archive; returns (references, blocks)."""
+    codec_id = CODECS[codec]
+    offsets, lengths, counts, firsts = [], [], [], []
+    with open(output_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, block_size, codec_id))
+        for block in iter_address_blocks(input_path, block_size):
+            payload = encode_block(block, codec_id)
+            offsets.append(out.tell())
+            lengths.append(len(payload))
+            counts.append(len(block))
+            firsts.append(int(block[0]))
+            out.write(payload)
+
+        index_offset = out.tell()
+        index = np.array([offsets, lengths, counts, firsts], dtype=np.uint64).reshape(4, -1)
+        out.write(index.astype("<u8").tobytes())
+        out.write(FOOTER.pack(len(counts), index_offset, FOOTER_MAGIC))
+    return int(sum(counts)), len(counts)
+
+
+# -----------------------------------------------------------------------------
+# Reader with block-level random access
+# -----------------------------------------------------------------------------
+class TraceArchive:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, self.block_size, self.codec = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a .trz trace archive")
+            f.seek(-FOOTER.size, os.SEEK_END)
+            num_blocks, index_offset, footer_magic = FOOTER.unpack(f.read(FOOTER.size))
+            if footer_magic != FOOTER_MAGIC:
+                raise ValueError(f"{path}: truncated archive (missing block index)")
+            f.seek(index_offset)
+            index = np.frombuffer(f.read(num_blocks * 32), dtype="<u8").reshape(4, num_blocks)
+        self.offsets = index[0].astype(np.int64)
+        self.lengths = index[1].astype(np.int64)
+        self.counts = index[2].astype(np.int64)
+        self.firsts = index[3].astype(np.uint64)
+        self.first_ref = np.concatenate(([0], np.cumsum(self.counts)[:-1])).astype(np.int64)
+
+    @property
+    def num_blocks(self):
+        return len(self.counts)
+
+    @property
+    def num_refs(self):
+        return int(self.counts.sum())
+
+    def read_block(self, i, f=None):
+        if f is None:
+            with open(self.path, "rb") as f:
+                return self.read_block(i, f)
+        f.seek(int(self.offsets[i]))
+        payload = f.read(int(self.lengths[i]))
+        return decode_block(payload, int(self.counts[i]), self.firsts[i], self.codec)
+
+    def iter_blocks(self, first=0, last=None):
+        last = self.num_blocks if last is None else last
+        with open(self.path, "rb") as f:
+            for i in range(first, last):
+                yield self.read_block(i, f)
+
+    def read_all(self):
+        blocks = list(self.iter_blocks())
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.uint64)
+
+    def read_ref_range(self, start, stop):
+        """References start..stop-1, decoding only the blocks that cover them."""
+        start, stop = max(0, start), min(stop, self.num_refs)
+        if start >= stop:
+            return np.zeros(0, dtype=np.uint64)
+        first = int(np.searchsorted(self.first_ref, start, side="right") - 1)
+        last = int(np.searchsorted(self.first_ref, stop - 1, side="right"))
+        block = np.concatenate(list(self.iter_blocks(first, last)))
+        base = int(self.first_ref[first])
+        return block[start - base:stop - base]
+
+
+if __name__ == "__main__":
+    usage = ("Usage:\n"
+             "  python trace_codec.py encode <trace_file> <output.trz> [none|zlib|lzma] [block_size]\n"
+             "  python trace_codec.py decode <input.trz> <output_file>\n"
+             "  python trace_codec.py info <input.trz>")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "encode" and len(sys.argv) in [4, 5, 6]:
+        codec = sys.argv[4] if len(sys.argv) >= 5 else "zlib"
+        block_size = int(sys.argv[5]) if len(sys.argv) == 6 else BLOCK_SIZE
+        refs, blocks = encode_trace(sys.argv[2], sys.argv[3], codec, block_size)
+        in_size, out_size = os.path.getsize(sys.argv[2]), os.path.getsize(sys.argv[3])
+        print(f"Encoded {refs:,} references in {blocks:,} blocks ({codec})")
+        print(f"  {in_size:,} -> {out_size:,} bytes ({out_size / max(refs, 1):.2f} bytes/ref, "
+              f"{in_size / max(out_size, 1):.1f}x smaller)")
+
+    elif command == "decode" and len(sys.argv) == 4:
+        written = write_trace(sys.argv[3], TraceArchive(sys.argv[2]).iter_blocks())
+        print(f"Decoded {written:,} references to '{sys.argv[3]}'.")
+
+    elif command == "info":
+        archive = TraceArchive(sys.argv[2])
+        print(f"References: {archive.num_refs:,}, blocks: {archive.num_blocks:,} "
+              f"(block size {archive.block_size:,}), codec: {CODEC_NAMES[archive.codec]}")
+        print(f"Compressed payload: {int(archive.lengths.sum()):,} bytes "
+              f"({archive.lengths.sum() / max(archive.num_refs, 1):.2f} bytes/ref)")
+
+    else:
+        print(usage)
+        sys.exit(1)
@@ -1,6 +1,8 @@
 import sys
 from collections import defaultdict
-import matplotlib.pyplot as plt
+import numpy as np
+from interning import load_interning, previous_occurrence, format_address
+from profiling import Profiler, pop_profile_flags
 
 
 def plot_cycle_histogram(cycles, title="Cycle length histogram", zoom_max=200):
@@ -14,6 +16,8 @@ def plot_cycle_histogram(cycles, title="Cycle length histogram", zoom_max=200):
         print("No cycles to plot.")
         return
 
+    import matplotlib.pyplot as plt     # loaded only when plotting
+
     # Prepare sorted cycle lengths and their counts
     x = sorted(cycles.keys())
     y = [cycles[k] for k in x]
@@ -46,50 +50,90 @@ def plot_cycle_histogram(cycles, title="Cycle length histogram", zoom_max=200):
     plt.show()
 
 
+def collect_cycles(trace_path):
+    """
+    Scan the trace once and return:
+      - addr_positions: address -> list of positions where it appeared
+      - cycles: cycle length -> number of times it occurred
+    """
+    # addr -> list of positions where the address appeared in trace
+    addr_positions = defaultdict(list)
+
+    # cycles[length] = number of times this cycle length occurred
+    cycles = defaultdict(int)
+
+    with open(trace_path, "r") as f:
+        pos = 0
+        for line in f:
+            addr = line.strip()
+            if not addr:
+                continue
+
+            pos += 1    # global sequential index in the trace
+
+            # Last occurrence of this address
+            prev_pos = addr_positions[addr][-1] if addr_positions[addr] else None
+
+            # Store current occurrence
+            addr_positions[addr].append(pos)
+
+            # If address was seen before, we detected a cycle
+            # Cycle length = distance from previous occurrence
+            if prev_pos is not None:
+                cycle_len = pos - prev_pos
+                cycles[cycle_len] += 1
+
+    return addr_positions, cycles
+
+
+def cycles_from_ids(ids):
+    """Same histogram as collect_cycles, computed from interned ids."""
+    prev = previous_occurrence(ids)
+    seen = prev >= 0
+    lengths = np.flatnonzero(seen) - prev[seen]
+    values, counts = np.unique(lengths, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def positions_from_ids(ids, num_unique):
+    """Yield (id, 1-based positions of that id) in id order, i.e. by address."""
+    order = np.argsort(ids, kind="stable")
+    bounds = np.cumsum(np.bincount(ids, minlength=num_unique))
+    start = 0
+    for addr_id, end in enumerate(bounds.tolist()):
+        yield addr_id, order[start:end] + 1
+        start = end
+
+
 def main():
+    profiler = Profiler(*pop_profile_flags(sys.argv))
+
     if len(sys.argv) < 2:
-        print("Usage: python3 trace_cycles.py <itrace_file> [out_prefix]")
+        print("Usage: python3 trace_cycles.py <itrace_file> [out_prefix] [--profile | --profile-memory]")
         sys.exit(1)
 
     trace_path = sys.argv[1]
     out_prefix = sys.argv[2] if len(sys.argv) >= 3 else "trace"
 
-    # addr -> list of positions where the address appeared in trace
-    addr_positions = defaultdict(list)
-
-    # cycles[length] = number of times this cycle length occurred
-    cycles = defaultdict(int)
-
     try:
-        with open(trace_path, "r") as f:
-            pos = 0
-            for line in f:
-                addr = line.strip()
-                if not addr:
-                    continue
-
-                pos += 1    # global sequential index in the trace
-                
-                # Last occurrence of this address 
-                prev_pos = addr_positions[addr][-1] if addr_positions[addr] else None
-
-                # Store current occurrence
-                addr_positions[addr].append(pos)
-
-                # If address was seen before, we detected a cycle
-                # Cycle length = distance from previous occurrence
-                if prev_pos is not None:
-                    cycle_len = pos - prev_pos
-                    cycles[cycle_len] += 1
-
+        # Interned ids are cached next to the trace and reused by later runs
+        with profiler.stage("intern"):
+            table, ids = load_interning(trace_path)
     except FileNotFoundError:
         print(f"Error: file not found: {trace_path}")
         sys.exit(1)
+    profiler.set_refs(len(ids))
+
+    with profiler.stage("cycles", refs=len(ids)):
+        cycles = cycles_from_ids(ids)
 
     # Basic statistics
-    total_refs = sum(len(v) for v in addr_positions.values())
-    unique_addrs = len(addr_positions)
+    total_refs = len(ids)
+    unique_addrs = len(table)
     total_cycles = sum(cycles.values())
+    profiler.count("refs", total_refs)
+    profiler.count("unique_addresses", unique_addrs)
+    profiler.count("cycles", total_cycles)
 
     print(f"Loaded: {trace_path}")
     print(f"Total references (non-empty lines): {total_refs:,}")
@@ -104,19 +148,20 @@ def main():
     # Write to files outputs
     # ------------------------------------------------------------
 
-    # File: address -> all positions where it occurred
-    positions_file = f"{out_prefix}_positions.tsv"
-    with open(positions_file, "w") as out:
-        out.write("address\tpositions\n")
-        for addr in sorted(addr_positions.keys()):
-            out.write(f"{addr}\t{','.join(map(str, addr_positions[addr]))}\n")
-
-    # File: histogram of cycle lengths
-    cycles_file = f"{out_prefix}_cycle_hist.tsv"
-    with open(cycles_file, "w") as out:
-        out.write("cycle_length\tcount\n")
-        for length in sorted(cycles.keys()):
-            out.write(f"{length}\t{cycles[length]}\n")
+    with profiler.stage("write"):
+        # File: address -> all positions where it occurred
+        positions_file = f"{out_prefix}_positions.tsv"
+        with open(positions_file, "w") as out:
+            out.write("address\tpositions\n")
+            for addr_id, positions in positions_from_ids(ids, unique_addrs):
+                out.write(f"{format_address(table[addr_id])}\t{','.join(map(str, positions.tolist()))}\n")
+
+        # File: histogram of cycle lengths
+        cycles_file = f"{out_prefix}_cycle_hist.tsv"
+        with open(cycles_file, "w") as out:
+            out.write("cycle_length\tcount\n")
+            for length in sorted(cycles.keys()):
+                out.write(f"{length}\t{cycles[length]}\n")
 
     # Print top 15 most frequent cycle lengths
     if cycles:
@@ -129,9 +174,12 @@ def main():
     print(f"  {positions_file}")
     print(f"  {cycles_file}")
 
-    # ---- PLOT ----
-    plot_cycle_histogram(cycles,
-        title=f"Cycle Length Histogram (N = {total_cycles} cycles)")
+    # ---- PLOT ---- (stage includes the time the windows stay open)
+    with profiler.stage("plot"):
+        plot_cycle_histogram(cycles,
+            title=f"Cycle Length Histogram (N = {total_cycles} cycles)")
+
+    profiler.write_report(f"{out_prefix}_profile.json")
 
 
 if __name__ == "__main__":
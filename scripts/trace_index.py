@@ -0,0 +1,214 @@
+import itertools
+import os
+import sys
+import numpy as np
+from trace_io import is_archive, is_binary_trace, parse_hex_lines
+
+INDEX_SUFFIX = ".idx.npz"
+CHUNK_REFS = 1 << 16        # references (text: lines) per checkpoint
+PAGE_SHIFT = 12             # 4KB pages for the bitmap summary
+BITMAP_BITS = 256           # bits of the per-chunk page bitmap
+BITMAP_WORDS = BITMAP_BITS // 64
+HASH_MULT = np.uint64(0x9E3779B97F4A7C15)
+
+
+# -----------------------------------------------------------------------------
+# Page bitmap summary: every page hashes to one of BITMAP_BITS bits
+# -----------------------------------------------------------------------------
+def page_bits(pages):
+    return ((np.asarray(pages, dtype=np.uint64) * HASH_MULT) >> np.uint64(64 - 8)).astype(np.int64) % BITMAP_BITS
+
+
+def page_bitmap(addresses):
+    bits = np.unique(page_bits(np.asarray(addresses, dtype=np.uint64) >> np.uint64(PAGE_SHIFT)))
+    words = np.zeros(BITMAP_WORDS, dtype=np.uint64)
+    np.bitwise_or.at(words, bits // 64, np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)))
+    return words
+
+
+# -----------------------------------------------------------------------------
+# Building
+# -----------------------------------------------------------------------------
+def _text_chunks(path, chunk_refs):
+    """Yield (byte offset, addresses) for every chunk of chunk_refs lines."""
+    offset = 0
+    with open(path, "rb") as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_refs))
+            if not lines:
+                return
+            block, done = parse_hex_lines(line.decode("ascii", "replace") for line in lines)
+            yield offset, block
+            offset += sum(len(line) for line in lines)
+            if done:
+                return
+
+
+def _binary_chunks(path, chunk_refs):
+    data = np.memmap(path, dtype="<u8", mode="r")
+    for start in range(0, len(data), chunk_refs):
+        yield start * 8, np.asarray(data[start:start + chunk_refs], dtype=np.uint64)
+
+
+def _archive_chunks(path, chunk_refs):
+    """One chunk per stored .trz block; the checkpoint is the block number."""
+    from trace_codec import TraceArchive
+    for i, block in enumerate(TraceArchive(path).iter_blocks()):
+        yield i, block
+
+
+def build_index(trace_path, chunk_refs=CHUNK_REFS):
+    """
+    Scan the trace once and write the chunk checkpoints to <trace>.idx.npz.
+    .trz archives keep their own blocks as chunks (chunk_refs is then the
+    archive's block size), so the index only adds the address summaries.
+    """
+    if is_archive(trace_path):
+        from trace_codec import TraceArchive
+        chunks, chunk_refs = _archive_chunks, TraceArchive(trace_path).block_size
+    elif is_binary_trace(trace_path):
+        chunks = _binary_chunks
+    else:
+        chunks = _text_chunks
+    offsets, first_refs, counts, mins, maxs, bitmaps = [], [], [], [], [], []
+    ref = 0
+    for offset, block in chunks(trace_path, chunk_refs):
+        offsets.append(offset)
+        first_refs.append(ref)
+        counts.append(len(block))
+        mins.append(block.min() if len(block) else np.uint64(2**64 - 1))
+        maxs.append(block.max() if len(block) else np.uint64(0))
+        bitmaps.append(page_bitmap(block))
+        ref += len(block)
+
+    index = {
+        "offsets": np.array(offsets, dtype=np.int64),
+        "first_ref": np.array(first_refs, dtype=np.int64),
+        "counts": np.array(counts, dtype=np.int64),
+        "min_addr": np.array(mins, dtype=np.uint64),
+        "max_addr": np.array(maxs, dtype=np.uint64),
+        "page_bitmap": np.array(bitmaps, dtype=np.uint64).reshape(-1, BITMAP_WORDS),
+        "chunk_refs": np.int64(chunk_refs),
+    }
+    np.savez(trace_path + INDEX_SUFFIX, **index)
+    return index
+
+
+def load_index(trace_path):
+    """Load the sidecar index, (re)building it when missing or older than the trace."""
+    path = trace_path + INDEX_SUFFIX
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(trace_path):
+        return build_index(trace_path)
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+def read_chunk(trace_path, index, chunk):
+    """Addresses of one chunk, read by seeking to its checkpoint."""
+    offset, count = int(index["offsets"][chunk]), int(index["counts"][chunk])
+    if is_archive(trace_path):
+        from trace_codec import TraceArchive
+        return TraceArchive(trace_path).read_block(offset)
+    if is_binary_trace(trace_path):
+        return np.fromfile(trace_path, dtype="<u8", count=count, offset=offset).astype(np.uint64)
+    with open(trace_path, "rb") as f:
+        f.seek(offset)
+        lines = itertools.islice(f, int(index["chunk_refs"]))
+        return parse_hex_lines(line.decode("ascii", "replace") for line in lines)[0]
+
+
+def read_ref_range(trace_path, index, start, stop):
+    """References start..stop-1 without reading the chunks before them."""
+    first_ref = index["first_ref"]
+    total = int(first_ref[-1] + index["counts"][-1]) if len(first_ref) else 0
+    start, stop = max(0, start), min(stop, total)
+    if start >= stop:
+        return np.zeros(0, dtype=np.uint64)
+
+    first = np.searchsorted(first_ref, start, side="right") - 1
+    last = np.searchsorted(first_ref, stop - 1, side="right") - 1
+    parts = [read_chunk(trace_path, index, c) for c in range(first, last + 1)]
+    block = np.concatenate(parts)
+    base = int(first_ref[first])
+    return block[start - base:stop - base]
+
+
+def candidate_chunks(index, lo, hi):
+    """Chunks that may contain an address in [lo, hi), using min/max and the page bitmap."""
+    lo, hi = np.uint64(lo), np.uint64(hi)
+    maybe = (index["max_addr"] >= lo) & (index["min_addr"] < hi)
+
+    # Bitmap test only pays off for narrow ranges
+    first_page, last_page = int(lo) >> PAGE_SHIFT, (int(hi) - 1) >> PAGE_SHIFT
+    if last_page - first_page < BITMAP_BITS:
+        query = page_bitmap(np.arange(first_page, last_page + 1, dtype=np.uint64) << np.uint64(PAGE_SHIFT))
+        maybe &= (index["page_bitmap"] & query).any(axis=1)
+    return np.flatnonzero(maybe)
+
+
+def read_address_range(trace_path, index, lo, hi):
+    """(reference positions, addresses) of all references with lo <= address < hi."""
+    positions, addresses = [], []
+    for chunk in candidate_chunks(index, lo, hi):
+        block = read_chunk(trace_path, index, chunk)
+        hit = np.flatnonzero((block >= np.uint64(lo)) & (block < np.uint64(hi)))
+        positions.append(hit + int(index["first_ref"][chunk]))
+        addresses.append(block[hit])
+    if not positions:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64)
+    return np.concatenate(positions), np.concatenate(addresses)
+
+
+def window_range(first_window, last_window, window_size, slide_step):
+    """Reference interval covered by prm.py sliding windows first..last (inclusive)."""
+    return first_window * slide_step, last_window * slide_step + window_size
+
+
+if __name__ == "__main__":
+    usage = ("Usage:\n"
+             "  python trace_index.py build <trace_file>\n"
+             "  python trace_index.py refs <trace_file> <start> <stop>\n"
+             "  python trace_index.py addr <trace_file> <lo_hex> <hi_hex>\n"
+             "  python trace_index.py windows <trace_file> <first> <last> <window_size> [memory_map_file]")
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+
+    command, trace_file = sys.argv[1], sys.argv[2]
+    if command == "build":
+        index = build_index(trace_file)
+        total = int(index["counts"].sum())
+        print(f"Indexed {total:,} references in {len(index['offsets']):,} chunks "
+              f"-> {trace_file + INDEX_SUFFIX}")
+
+    elif command == "refs" and len(sys.argv) == 5:
+        block = read_ref_range(trace_file, load_index(trace_file), int(sys.argv[3]), int(sys.argv[4]))
+        for addr in block.tolist():
+            print(hex(addr))
+
+    elif command == "addr" and len(sys.argv) == 5:
+        index = load_index(trace_file)
+        lo, hi = int(sys.argv[3], 16), int(sys.argv[4], 16)
+        positions, addresses = read_address_range(trace_file, index, lo, hi)
+        print(f"{len(positions):,} references in [{hex(lo)}, {hex(hi)}) "
+              f"from {len(candidate_chunks(index, lo, hi))} of {len(index['offsets'])} chunks")
+        for pos, addr in zip(positions[:50].tolist(), addresses[:50].tolist()):
+            print(f"  {pos}\t{hex(addr)}")
+
+    elif command == "windows" and len(sys.argv) in [6, 7]:
+        import prm
+        first, last, window_size = int(sys.argv[3]), int(sys.argv[4]), int(sys.argv[5])
+        prm.WINDOW_SIZE = window_size
+        prm.SLIDE_STEP = max(1, window_size // 10)
+        start, stop = window_range(first, last, prm.WINDOW_SIZE, prm.SLIDE_STEP)
+        block = read_ref_range(trace_file, load_index(trace_file), start, stop)
+        pages = (block // np.uint64(prm.PAGE_SIZE)).tolist()
+        print(f"Windows {first}-{last}: references {start:,}-{stop:,}")
+        prm.create_page_reference_map(trace_file, pages, sys.argv[6] if len(sys.argv) == 7 else None)
+
+    else:
+        print(usage)
+        sys.exit(1)
@@ -0,0 +1,137 @@
+import itertools
+import numpy as np
+
+BLOCK_SIZE = 1 << 20                    # references per streamed block
+BINARY_EXTENSIONS = (".bin", ".u64")    # raw little-endian uint64 traces
+ARCHIVE_EXTENSION = ".trz"              # compressed block archive (trace_codec.py)
+ARCHIVE_MAGIC = b"TRZ1"                 # first bytes of every archive, whatever its name
+
+
+# -----------------------------------------------------------------------------
+# Trace format detection and parsing
+# -----------------------------------------------------------------------------
+def is_binary_trace(path):
+    return str(path).endswith(BINARY_EXTENSIONS)
+
+
+def is_archive(path):
+    if str(path).endswith(ARCHIVE_EXTENSION):
+        return True
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+    except (OSError, TypeError):
+        return False
+
+
+def parse_hex_lines(lines):
+    """
+    Convert hex address lines to a uint64 array.
+    Empty lines and unparsable lines are skipped, '#' (e.g. #eof) ends the trace.
+    Returns (addresses, reached_end_marker).
+    """
+    values = []
+    for line in lines:
+        s = line.strip()
+        if not s:
+            continue
+        if s.startswith('#'):
+            return np.array(values, dtype=np.uint64), True
+        try:
+            values.append(int(s, 16))
+        except ValueError:
+            continue
+    return np.array(values, dtype=np.uint64), False
+
+
+# -----------------------------------------------------------------------------
+# Reading
+# -----------------------------------------------------------------------------
+def iter_address_blocks(path, block_size=BLOCK_SIZE):
+    """
+    Stream the trace as uint64 blocks of at most block_size references
+    (.trz archives are streamed in their own stored blocks).
+    """
+    if is_archive(path):
+        from trace_codec import TraceArchive
+        yield from TraceArchive(path).iter_blocks()
+        return
+
+    if is_binary_trace(path):
+        data = np.memmap(path, dtype="<u8", mode="r")
+        for start in range(0, len(data), block_size):
+            yield np.asarray(data[start:start + block_size], dtype=np.uint64)
+        return
+
+    with open(path, "r") as f:
+        while True:
+            lines = list(itertools.islice(f, block_size))
+            if not lines:
+                return
+            block, done = parse_hex_lines(lines)
+            if len(block):
+                yield block
+            if done:
+                return
+
+
+def read_addresses(path):
+    """Read a whole trace (text or binary) into a uint64 array."""
+    if is_binary_trace(path):
+        return np.fromfile(path, dtype="<u8").astype(np.uint64, copy=False)
+    blocks = list(iter_address_blocks(path))
+    if not blocks:
+        return np.zeros(0, dtype=np.uint64)
+    return np.concatenate(blocks)
+
+
+def read_pinatrace(path):
+    """
+    Read a Pin pinatrace file ("<ip>: R|W <addr>" per line) into (ips, addresses).
+    For a plain address trace ips is None.
+    """
+    if is_binary_trace(path) or is_archive(path):
+        return None, read_addresses(path)
+    ips, addresses = [], []
+    with open(path, "r") as f:
+        for line in f:
+            s = line.strip()
+            if s.startswith('#'):
+                break
+            parts = s.replace(":", " ").split()
+            if len(parts) != 3:
+                if len(parts) == 1 and not ips:     # plain trace: one address per line
+                    return None, read_addresses(path)
+                continue
+            try:
+                ips.append(int(parts[0], 16))
+                addresses.append(int(parts[2], 16))
+            except ValueError:
+                continue
+    return np.array(ips, dtype=np.uint64), np.array(addresses, dtype=np.uint64)
+
+
+# -----------------------------------------------------------------------------
+# Writing
+# -----------------------------------------------------------------------------
+def write_trace(path, blocks):
+    """
+    Write an iterable of address blocks as a text (one hex address per line)
+    or binary (uint64) trace, depending on the file extension.
+    Returns the number of written references.
+    """
+    total = 0
+    if is_binary_trace(path):
+        with open(path, "wb") as f:
+            for block in blocks:
+                np.asarray(block, dtype="<u8").tofile(f)
+                total += len(block)
+        return total
+
+    with open(path, "w") as f:
+        for block in blocks:
+            if len(block):
+                f.write("\n".join(map(hex, np.asarray(block).tolist())))
+                f.write("\n")
+            total += len(block)
+    return total
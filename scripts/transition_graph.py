@@ -0,0 +1,239 @@
+import sys
+import warnings
+import numpy as np
+from interning import load_interning, format_address
+
+DAMPING = 1.0           # probability of following an edge (teleport probability 1 - DAMPING)
+MAX_ITERATIONS = 1000
+TOLERANCE = 1e-9
+MAX_PATH = 64           # maximum length of an extracted hot path
+
+
+# -----------------------------------------------------------------------------
+# Weighted transition graph in CSR form
+# -----------------------------------------------------------------------------
+def build_transition_csr(ids, num_vertices):
+    """
+    Weighted directed graph of consecutive transitions src -> dst.
+    Returns (indptr, indices, weights): the out-edges of vertex v are
+    indices[indptr[v]:indptr[v+1]] with their transition counts in weights.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    keys = ids[:-1] * num_vertices + ids[1:]
+    keys, weights = np.unique(keys, return_counts=True)
+    return csr_from_keys(keys, weights, num_vertices)
+
+
+def csr_from_keys(keys, weights, num_vertices):
+    """CSR arrays from sorted src * num_vertices + dst keys and their weights."""
+    src, dst = np.divmod(keys, num_vertices)
+    indptr = np.zeros(num_vertices + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_vertices), out=indptr[1:])
+    return indptr, dst.astype(np.int64), weights.astype(np.int64)
+
+
+def edge_sources(indptr):
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+# -----------------------------------------------------------------------------
+# Strongly connected components (loops)
+# -----------------------------------------------------------------------------
+def strongly_connected_components(indptr, indices):
+    """Component label per vertex; uses scipy when available, else iterative Tarjan."""
+    n = len(indptr) - 1
+    try:
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import connected_components
+    except ImportError:
+        return _tarjan(indptr, indices, n)
+    matrix = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+    return connected_components(matrix, directed=True, connection="strong")[1]
+
+
+def _tarjan(indptr, indices, n):
+    indptr, indices = indptr.tolist(), indices.tolist()
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    labels = [-1] * n
+    stack = []
+    counter = 0
+    component = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, indptr[root])]
+
+        while work:
+            v, pos = work[-1]
+            if pos < indptr[v + 1]:
+                w = indices[pos]
+                work[-1] = (v, pos + 1)
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, indptr[w]))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    labels[w] = component
+                    if w == v:
+                        break
+                component += 1
+
+    return np.array(labels, dtype=np.int64)
+
+
+def rank_loops(indptr, indices, weights, labels):
+    """
+    Loops = components with an internal edge (size > 1 or a self-loop), ranked
+    by the number of transitions executed inside them.
+    Returns a list of (component, vertices, internal weight).
+    """
+    src = edge_sources(indptr)
+    internal = labels[src] == labels[indices]
+    loop_weight = np.bincount(labels[src][internal], weights=weights[internal],
+                              minlength=labels.max() + 1 if len(labels) else 0)
+    sizes = np.bincount(labels) if len(labels) else np.zeros(0, dtype=np.int64)
+    order = np.argsort(loop_weight, kind="stable")[::-1]
+    return [(int(c), int(sizes[c]), int(loop_weight[c])) for c in order if loop_weight[c] > 0]
+
+
+# -----------------------------------------------------------------------------
+# Stationary visit probabilities (sparse power iteration)
+# -----------------------------------------------------------------------------
+def stationary_distribution(indptr, indices, weights, restart=None, damping=DAMPING,
+                            max_iterations=MAX_ITERATIONS, tol=TOLERANCE):
+    """
+    Stationary distribution of the random walk that follows edges with
+    probability proportional to their transition counts.
+    Mass reaching a vertex without out-edges (end of the trace) and the
+    1 - damping teleport share go to the restart distribution (uniform by
+    default; pass the first vertex of the trace to model re-running it).
+    The walk is made lazy (stay with probability 1/2) so periodic loops converge,
+    and it starts from the observed in-flow, which is already close to
+    stationary for a trace-derived graph, so few iterations are needed.
+    A RuntimeWarning is issued when max_iterations is reached before the L1
+    change drops below tol; the last iterate is returned.
+    """
+    n = len(indptr) - 1
+    src = edge_sources(indptr)
+    out_weight = np.bincount(src, weights=weights, minlength=n)
+    edge_prob = weights / out_weight[src]
+    dangling = out_weight == 0
+    restart = np.full(n, 1.0 / n) if restart is None else restart / restart.sum()
+
+    p = np.bincount(indices, weights=weights, minlength=n) + restart
+    p = p / p.sum()
+    change = np.inf
+    for _ in range(max_iterations):
+        step = np.bincount(indices, weights=p[src] * edge_prob, minlength=n)
+        step = damping * (step + p[dangling].sum() * restart) + (1.0 - damping) * restart
+        nxt = 0.5 * (p + step)
+        change = np.abs(nxt - p).sum()
+        if change < tol:
+            return nxt
+        p = nxt
+    warnings.warn(f"stationary distribution did not converge in {max_iterations} iterations "
+                  f"(L1 change {change:.3g}, tolerance {tol:.3g})", RuntimeWarning, stacklevel=2)
+    return p
+
+
+# -----------------------------------------------------------------------------
+# Hot paths
+# -----------------------------------------------------------------------------
+def heaviest_successors(indptr, indices, weights, labels=None):
+    """Per vertex the heaviest out-neighbour (inside its own component if labels given), -1 if none."""
+    n = len(indptr) - 1
+    src = edge_sources(indptr)
+    w = weights.astype(np.float64)
+    if labels is not None:
+        w = np.where(labels[src] == labels[indices], w, -1.0)
+    # sort edges by (src, weight) and keep the last edge of every source
+    order = np.lexsort((w, src))
+    last = np.flatnonzero(np.diff(np.append(src[order], n)) != 0)
+    best = np.full(n, -1, dtype=np.int64)
+    keep = w[order[last]] >= 0
+    best[src[order[last]][keep]] = indices[order[last]][keep]
+    return best
+
+
+def hot_path(start, successors, max_length=MAX_PATH):
+    """Follow the heaviest edges from start until a vertex repeats."""
+    path, seen = [start], {start}
+    v = start
+    while len(path) < max_length:
+        v = int(successors[v])
+        if v < 0 or v in seen:
+            break
+        path.append(v)
+        seen.add(v)
+    return path
+
+
+def loop_hot_paths(indptr, indices, weights, labels, loops, visits, top=5):
+    """Dominant cycle of each of the top loops, entered at its most visited vertex."""
+    successors = heaviest_successors(indptr, indices, weights, labels)
+    paths = []
+    for component, _, _ in loops[:top]:
+        members = np.flatnonzero(labels == component)
+        start = int(members[np.argmax(visits[members])])
+        paths.append(hot_path(start, successors))
+    return paths
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3]:
+        print("Usage: python transition_graph.py <itrace_file> [top]")
+        sys.exit(1)
+
+    trace_file = sys.argv[1]
+    top = int(sys.argv[2]) if len(sys.argv) == 3 else 10
+
+    table, ids = load_interning(trace_file)
+    if len(ids) == 0:
+        print("Trace file is empty.")
+        sys.exit(1)
+
+    indptr, indices, weights = build_transition_csr(ids, len(table))
+    total = int(weights.sum())
+    print(f"Vertices: {len(table):,}, distinct edges: {len(indices):,}, transitions: {total:,}")
+
+    labels = strongly_connected_components(indptr, indices)
+    loops = rank_loops(indptr, indices, weights, labels)
+    print(f"Strongly connected components: {labels.max() + 1:,}, loops: {len(loops):,}")
+
+    restart = np.zeros(len(table))
+    restart[int(ids[0])] = 1.0      # end of trace -> program restarts
+    stationary = stationary_distribution(indptr, indices, weights, restart)
+    visits = np.bincount(np.asarray(ids, dtype=np.int64), minlength=len(table))
+
+    print(f"\nTop {top} loops by executed transitions:")
+    paths = loop_hot_paths(indptr, indices, weights, labels, loops, visits, top)
+    for (component, size, weight), path in zip(loops[:top], paths):
+        print(f"  component {component}: {size} vertices, {weight:,} transitions "
+              f"({weight / max(total, 1) * 100:.2f}%), entry {format_address(table[path[0]])}")
+        shown = " -> ".join(format_address(table[v]) for v in path[:8])
+        print(f"    hot path ({len(path)}): {shown}{' -> ...' if len(path) > 8 else ''}")
+
+    print(f"\nTop {top} vertices by stationary visit probability:")
+    for v in np.argsort(stationary)[::-1][:top]:
+        print(f"  {format_address(table[v])}\tp={stationary[v]:.5f}\tvisits={visits[v]:,}")
@@ -0,0 +1,147 @@
+import sys
+import numpy as np
+from interning import load_interning, previous_occurrence, next_occurrence
+from multi_granularity import GRANULARITIES, coarsen
+
+
+# -----------------------------------------------------------------------------
+# Working-set size W(t, tau): number of distinct pages/lines referenced in the
+# window of the last tau references (t - tau, t] (Denning).
+# -----------------------------------------------------------------------------
+def working_set_series(ids, tau, prev=None, nxt=None):
+    """
+    Exact W(t, tau) for every t in O(N) from previous/next-occurrence arrays:
+      +1 at t when the reference at t is not already in the window (t - prev >= tau)
+      -1 at t when the reference leaving the window (j = t - tau) has no later
+         occurrence inside it (next(j) - j >= tau)
+    """
+    prev = previous_occurrence(ids) if prev is None else prev
+    nxt = next_occurrence(ids) if nxt is None else nxt
+    return working_set_range(prev, nxt, tau, 0, len(ids))
+
+
+def working_set_range(prev, nxt, tau, start, stop):
+    """
+    W(t, tau) - W(start - 1, tau) for t = start..stop-1, so the series can be
+    computed in pieces of bounded size (add the last value of the previous piece).
+    """
+    t = np.arange(start, stop)
+    prev = prev[start:stop]
+    enter = (prev < 0) | (t - prev >= tau)
+    leave = np.zeros(stop - start, dtype=bool)
+    first = max(tau - start, 0)             # t - tau >= 0 from here on
+    if first < stop - start:
+        j = t[first:] - tau
+        leave[first:] = nxt[j] - j >= tau
+    return np.cumsum(enter, dtype=np.int64) - np.cumsum(leave, dtype=np.int64)
+
+
+def mean_working_set_curve(ids, max_tau, nxt=None):
+    """
+    Exact mean working-set size s(tau) = mean over t of W(t, tau) for all
+    tau = 1..max_tau at once. Reference i stays counted for
+    c_i = min(next(i) - i, N - i) windows ending after it (capped at tau), so
+      sum_t W(t, tau) = sum_i min(tau, c_i) = sum_{k=1..tau} #{i : c_i >= k}.
+    Returns s[0..max_tau] with s[0] = 0.
+    """
+    n = len(ids)
+    nxt = next_occurrence(ids) if nxt is None else nxt
+    c = np.minimum(nxt, n) - np.arange(n)
+    hist = np.bincount(np.minimum(c, max_tau), minlength=max_tau + 1)
+    at_least = n - np.cumsum(hist)[:-1]          # at_least[k-1] = #{c_i >= k}
+    return np.concatenate(([0.0], np.cumsum(at_least) / n))
+
+
+def fault_rate_curve(ids, max_tau, prev=None):
+    """
+    Working-set policy fault rate m(tau): fraction of references whose previous
+    occurrence is more than tau references back (or absent), tau = 0..max_tau.
+    """
+    n = len(ids)
+    prev = previous_occurrence(ids) if prev is None else prev
+    distance = np.where(prev < 0, max_tau + 1, np.arange(n) - prev)
+    hist = np.bincount(np.minimum(distance, max_tau + 1), minlength=max_tau + 2)
+    within = np.cumsum(hist)[:max_tau + 1]       # within[tau] = #{distance <= tau}
+    return 1.0 - within / n
+
+
+def size_for_fault_rate(sizes, faults, target):
+    """Smallest tau whose fault rate is <= target, with its mean working-set size."""
+    ok = np.flatnonzero(faults <= target)
+    if len(ok) == 0:
+        return None
+    tau = int(ok[0])
+    return tau, float(sizes[tau])
+
+
+# -----------------------------------------------------------------------------
+# Plots
+# -----------------------------------------------------------------------------
+def plot_working_set(series, sizes, tau, unit):
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 4))
+    plt.plot(series, linewidth=0.8)
+    plt.xlabel("Reference index t")
+    plt.ylabel(f"W(t, {tau}) [{unit}s]")
+    plt.title(f"Working-set size over time (tau = {tau})")
+    plt.tight_layout()
+    plt.show()
+
+    plt.figure(figsize=(10, 4))
+    plt.plot(np.arange(len(sizes)), sizes)
+    plt.xscale("log")
+    plt.xlabel("Window tau (log scale)")
+    plt.ylabel(f"Mean working-set size [{unit}s]")
+    plt.title("Mean working-set size curve s(tau)")
+    plt.tight_layout()
+    plt.show()
+
+
+if __name__ == "__main__":
+    plot = "--plot" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--plot"]
+    if len(args) not in [2, 3] or (len(args) == 3 and args[2] not in GRANULARITIES):
+        print("Usage: python working_set.py <trace_file> <tau> [page|line|...] [--plot]")
+        sys.exit(1)
+
+    trace_file = args[0]
+    tau = int(args[1])
+    unit = args[2] if len(args) == 3 else "page"
+    shift = GRANULARITIES[unit]
+
+    table, ids = load_interning(trace_file)
+    if len(ids) == 0:
+        print("Trace file is empty.")
+        sys.exit(1)
+
+    _, unit_ids = coarsen(table, np.asarray(ids), shift)
+    prev, nxt = previous_occurrence(unit_ids), next_occurrence(unit_ids)
+
+    series = working_set_series(unit_ids, tau, prev, nxt)
+    max_tau = min(len(unit_ids), max(tau, 1 << 20))
+    sizes = mean_working_set_curve(unit_ids, max_tau, nxt)
+    faults = fault_rate_curve(unit_ids, max_tau, prev)
+
+    print(f"References: {len(unit_ids):,}, granularity: {unit} ({1 << shift}B)")
+    print(f"W(t, {tau}): mean {series.mean():.2f}, max {series.max()}, "
+          f"final {series[-1]} {unit}s")
+
+    print("\n  tau        mean W     MB    fault rate")
+    t = 1
+    while t <= max_tau:
+        print(f"  {t:<9d} {sizes[t]:9.2f} {sizes[t] * (1 << shift) / 2**20:7.2f} {faults[t] * 100:9.3f}%")
+        t *= 4
+
+    print("\nMemory sizing (working-set policy):")
+    for target in (0.10, 0.01, 0.001):
+        found = size_for_fault_rate(sizes, faults, target)
+        if found:
+            t, size = found
+            print(f"  fault rate <= {target * 100:g}%: tau = {t}, "
+                  f"{size:.1f} {unit}s ({size * (1 << shift) / 2**20:.2f} MB)")
+        else:
+            print(f"  fault rate <= {target * 100:g}%: not reached (cold misses)")
+
+    if plot:
+        plot_working_set(series, sizes, tau, unit)
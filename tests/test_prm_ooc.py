@@ -0,0 +1,49 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from prm import build_windows, read_trace
+from prm_ooc import open_columns, write_window_columns
+from trace_io import write_trace
+
+# -----------------------------------------------------------------------------
+# The out-of-core column store must hold exactly prm.build_windows' windows,
+# also when the memory budget splits the trace into many blocks.
+# -----------------------------------------------------------------------------
+SAMPLE_TRACE = os.path.join(os.path.dirname(__file__), "..", "data", "addresses.out")
+WINDOW_SIZE = 100
+MEMORY_BUDGET = 200_000     # a few hundred references per block
+
+
+@pytest.fixture(scope="module")
+def trace_file(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    addresses = 0x7f0000000000 + rng.integers(0, 64, 20_000, dtype=np.uint64) * np.uint64(4096)
+    path = str(tmp_path_factory.mktemp("prm_ooc") / "trace.out")
+    write_trace(path, [addresses])
+    return path
+
+
+def stored_windows(store_dir):
+    colptr, pages = open_columns(store_dir)
+    return [set(pages[colptr[w]:colptr[w + 1]].tolist()) for w in range(len(colptr) - 1)]
+
+
+@pytest.mark.parametrize("slide_step", [1, 37, WINDOW_SIZE, 150, 1000])
+def test_matches_build_windows(trace_file, tmp_path, slide_step):
+    num_windows, _ = write_window_columns(trace_file, str(tmp_path / "store"), WINDOW_SIZE, slide_step,
+                                          MEMORY_BUDGET)
+    expected = build_windows(read_trace(trace_file), WINDOW_SIZE, slide_step)
+    assert num_windows == len(expected)
+    assert stored_windows(str(tmp_path / "store")) == expected
+
+
+@pytest.mark.skipif(not os.path.exists(SAMPLE_TRACE), reason="sample trace not available")
+@pytest.mark.parametrize("slide_step", [50, 150, 1000])
+def test_sample_trace(tmp_path, slide_step):
+    write_window_columns(SAMPLE_TRACE, str(tmp_path / "store"), WINDOW_SIZE, slide_step, MEMORY_BUDGET)
+    assert stored_windows(str(tmp_path / "store")) == build_windows(read_trace(SAMPLE_TRACE), WINDOW_SIZE,
+                                                                    slide_step)